@@ -0,0 +1,215 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Tuple
+
+DIRNAME = os.path.dirname(os.path.abspath(__file__))
+
+# days are plain directories with scripts, not packages
+for day_directory in sorted(os.listdir(DIRNAME)):
+    if day_directory.startswith("day_"):
+        sys.path.insert(0, os.path.join(DIRNAME, day_directory))
+
+import cube_onundrum  # noqa: E402
+import gear_ratios  # noqa: E402
+import scratchcards  # noqa: E402
+import seeds  # noqa: E402
+import trebuchet  # noqa: E402
+from bench_cube_onundrum import generate_games  # noqa: E402
+from bench_gear_ratios import generate_schematic  # noqa: E402
+from bench_scratchcards import generate_cards  # noqa: E402
+from bench_seeds import generate_almanac  # noqa: E402
+from bench_trebuchet import generate_input  # noqa: E402
+
+Solvers = Dict[str, Callable[[], object]]
+
+
+@dataclass
+class Result:
+    day: str
+    solver: str
+    size: int
+    seconds: float
+    lines_per_second: float
+    peak_mb: float
+
+
+def count_lines(filename: str) -> int:
+    with open(filename, "rb") as f:
+        return sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 20), b""))
+
+
+def solve_file(function: Callable, filename: str, *args) -> Callable[[], object]:
+    def run():
+        with open(filename) as f:
+            return function(f, *args)
+
+    return run
+
+
+def day_01(size: int, tmp: str, seed: int, width: int) -> Tuple[int, Solvers]:
+    filename = os.path.join(tmp, f"day_01_{size}.txt")
+    generate_input(filename, size * 14, seed)
+    file_size = os.path.getsize(filename)
+    solvers = {}
+    for part, engines in (("part2", trebuchet.ENGINES), ("part1", trebuchet.PART_ONE_ENGINES)):
+        for name, engine in engines.items():
+            solvers[f"{part} {name}"] = lambda engine=engine: engine(filename, 0, file_size)
+
+    return count_lines(filename), solvers
+
+
+def day_02(size: int, tmp: str, seed: int, width: int) -> Tuple[int, Solvers]:
+    filename = os.path.join(tmp, f"day_02_{size}.txt")
+    generate_games(filename, size, seed)
+    limits = [(red, green, blue) for red in range(0, 21, 4) for green in range(0, 21, 4) for blue in range(0, 21, 4)]
+    return size, {
+        "stream": solve_file(cube_onundrum.sum_games, filename, True),
+        "columnar": solve_file(lambda f: cube_onundrum.games_possible(cube_onundrum.parse_games_columnar(f)), filename),
+        "index 216 limits": solve_file(lambda f: cube_onundrum.GameIndex.from_lines(f).possible_sums(limits), filename),
+    }
+
+
+def day_03(size: int, tmp: str, seed: int, width: int) -> Tuple[int, Solvers]:
+    lines = generate_schematic(size, width, seed)
+    return size, {name: (lambda e=engine: e(lines)) for name, engine in gear_ratios.ENGINES.items()}
+
+
+def day_04(size: int, tmp: str, seed: int, width: int) -> Tuple[int, Solvers]:
+    filename = os.path.join(tmp, f"day_04_{size}.txt")
+    generate_cards(filename, size, seed=seed)
+    return size, {
+        "stream": solve_file(scratchcards.score_stream, filename, 2**64),
+        "table": lambda: scratchcards.Scratchcards(scratchcards.parse_file(filename)).copies_modulo(2**64),
+    }
+
+
+def day_05(size: int, tmp: str, seed: int, width: int) -> Tuple[int, Solvers]:
+    filename = os.path.join(tmp, f"day_05_{size}.txt")
+    generate_almanac(filename, size, seed=seed)
+
+    def seed_to_location():
+        seeds_list, mappings = seeds.parse_file(filename)
+        maps = {name: mapping.maps for name, mapping in mappings.items()}
+        return min(seeds.seed_to_location(seed, maps) for seed in seeds_list)
+
+    def compiled():
+        seeds_list, mappings = seeds.parse_file(filename)
+        return min(seeds.seeds_to_locations(seeds_list, seeds.compile_mappings(mappings)))
+
+    def intervals():
+        seeds_list, mappings = seeds.parse_file(filename)
+        return seeds.lowest_location_for_intervals(seeds.seed_intervals(seeds_list), seeds.compile_mappings(mappings))
+
+    def vectorised():
+        seeds_list, mappings = seeds.parse_file(filename)
+        return seeds.lowest_location_numpy(seeds_list, seeds.compile_mappings(mappings))
+
+    def composed():
+        seeds_list, mappings = seeds.parse_file(filename)
+        return min(seeds.compose_all(seeds.compile_mappings(mappings)).remap_all(seeds_list))
+
+    def reverse():
+        seeds_list, mappings = seeds.parse_file(filename)
+        reverse = seeds.ReverseMapping.from_mapping(seeds.compose_all(seeds.compile_mappings(mappings)))
+        return seeds.lowest_location_by_reverse(seeds.seed_intervals(seeds_list), reverse)
+
+    return size, {
+        "seed_to_location": seed_to_location,
+        "compiled": compiled,
+        "numpy": vectorised,
+        "composed": composed,
+        "part2 intervals": intervals,
+        "part2 reverse": reverse,
+    }
+
+
+DAYS = {
+    "day_01": day_01,
+    "day_02": day_02,
+    "day_03": day_03,
+    "day_04": day_04,
+    "day_05": day_05,
+}
+
+
+def measure(solver: Callable[[], object], memory: bool) -> Tuple[float, float]:
+    # solvers print their progress, output is dropped so that it does not distort time
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        solver()
+        seconds = time.perf_counter() - start
+
+        peak = 0
+        if memory:
+            # separate run, tracing slows python code down
+            tracemalloc.start()
+            solver()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    return seconds, peak / 2**20
+
+
+def compare(results: List[Result], baseline_filename: str, tolerance: float) -> List[str]:
+    with open(baseline_filename) as f:
+        baseline = {(item["day"], item["solver"], item["size"]): item for item in json.load(f)}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get((result.day, result.solver, result.size))
+        if previous is not None and result.seconds > previous["seconds"] * tolerance:
+            regressions.append(
+                f"{result.day} {result.solver} {result.size}: {previous['seconds']:.3f} s -> {result.seconds:.3f} s"
+            )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark solvers of all days on generated inputs.")
+    parser.add_argument("--days", nargs="+", choices=DAYS, default=list(DAYS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="lines, games, cards or seeds")
+    parser.add_argument("--width", type=int, default=140, help="columns of day 3 schematic")
+    parser.add_argument("--seed", type=int, default=2023)
+    parser.add_argument("--no-memory", action="store_true", help="skip peak memory measurement")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results of previous run, exit with 1 when a solver is slower")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown against baseline")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'day':6s} {'solver':18s} {'size':>9s} {'time [s]':>10s} {'lines/s':>12s} {'peak [MB]':>10s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for day in args.days:
+            for size in args.sizes:
+                lines, solvers = DAYS[day](size, tmp, args.seed, args.width)
+                for solver_name, solver in solvers.items():
+                    seconds, peak = measure(solver, not args.no_memory)
+                    result = Result(day, solver_name, size, seconds, lines / seconds if seconds else 0.0, peak)
+                    results.append(result)
+                    print(
+                        f"{day:6s} {solver_name:18s} {size:9d} {seconds:10.3f} "
+                        f"{result.lines_per_second:12.0f} {peak:10.1f}"
+                    )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from trebuchet import ENGINES, digits, trebuchet
+
+
+def generate_input(filename: str, size: int, seed: int = 2023) -> None:
+    # build a pool of random calibration lines once and then write random picks from it, that is fast enough for GBs
+    rnd = random.Random(seed)
+    tokens = list("abcdefghijklmnopqrstuvwxyz") * 3 + list("123456789") + list(digits)
+    pool = []
+    for _ in range(10000):
+        line = "".join(rnd.choice(tokens) for _ in range(rnd.randint(3, 20)))
+        pool.append(line + str(rnd.randint(1, 9)) + "\n")
+
+    written = 0
+    with open(filename, "w") as f:
+        while written < size:
+            block = "".join(rnd.choices(pool, k=10000))
+            f.write(block)
+            written += len(block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequential and parallel trebuchet on synthetic input.")
+    parser.add_argument("--size-mb", type=int, default=1024, help="size of generated input in MB")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--seed", type=int, default=2023)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "input.txt")
+        generate_input(filename, args.size_mb * 1024 * 1024, args.seed)
+
+        results = {}
+        base_time = None
+        for engine in args.engines:
+            for workers in args.workers:
+                start = time.perf_counter()
+                results[(engine, workers)] = trebuchet(filename, workers=workers, engine=engine)
+                elapsed = time.perf_counter() - start
+                base_time = base_time or elapsed
+                print(
+                    f"engine: {engine:6s}, workers: {workers:2d}, time: {elapsed:8.3f} s, "
+                    f"throughput: {args.size_mb / elapsed:8.2f} MB/s, speedup: {base_time / elapsed:5.2f}x"
+                )
+
+        assert len(set(results.values())) == 1, f"results differ: {results}"
+
+
+if __name__ == "__main__":
+    main()
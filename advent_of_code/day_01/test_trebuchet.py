@@ -1,5 +1,100 @@
-from trebuchet import main
+import os
+import sys
 
+import pytest
 
-def test_example():
-    assert main()
+from trebuchet import (
+    chunk_offsets,
+    find_digit,
+    find_first_and_last_digit,
+    find_last_digit,
+    main,
+    sum_calibration_values,
+    sum_chunk,
+    sum_mmap_chunk,
+    sum_numpy_chunk,
+    trebuchet,
+)
+
+DIRNAME = os.path.dirname(__file__)
+
+
+def test_example(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["trebuchet.py", os.path.join(DIRNAME, "example.txt")])
+    assert main() == 142
+
+
+def test_trebuchet_examples():
+    assert trebuchet(os.path.join(DIRNAME, "example.txt")) == 142
+    assert trebuchet(os.path.join(DIRNAME, "example2.txt")) == 281
+
+
+def test_sum_calibration_values_streams_any_iterable():
+    lines = (line for line in ["two1nine\n", "eightwothree\n", "\n", "zoneight234\n"])
+    assert sum_calibration_values(lines) == 29 + 83 + 14
+
+
+def test_find_first_and_last_digit_overlapping_words():
+    assert find_first_and_last_digit("oneight") == (1, 8)
+    assert find_first_and_last_digit("xtwone3four") == (2, 4)
+    assert find_first_and_last_digit("treb7uchet") == (7, 7)
+    assert find_first_and_last_digit("abc") == (None, None)
+
+
+def test_find_last_digit_scans_backwards():
+    assert find_last_digit("7pqrstsixteen") == 6
+    assert find_last_digit("zoneight") == 8
+    assert find_last_digit("two1nine", spelled=False) == 1
+    assert find_last_digit("nine", spelled=False) is None
+    assert find_last_digit("") is None
+
+
+def test_find_first_and_last_digit_matches_find_digit():
+    with open(os.path.join(DIRNAME, "input.txt")) as f:
+        for line in f:
+            line = line.rstrip()
+            found = []
+            index = 0
+            while index < len(line):
+                digit, index = find_digit(line, index)
+                if digit is not None:
+                    found.append(digit)
+
+            assert find_first_and_last_digit(line) == (found[0], found[-1])
+
+
+def test_parallel_sum_matches_sequential():
+    filename = os.path.join(DIRNAME, "input.txt")
+    for workers in [1, 2, 3, 7]:
+        assert sum(sum_chunk(filename, start, end) for start, end in chunk_offsets(filename, workers)) == 53866
+
+    assert trebuchet(filename, workers=4) == trebuchet(filename)
+
+
+def test_mmap_engine_matches_lines_engine():
+    for name, expected in [("example.txt", 142), ("example2.txt", 281), ("input.txt", 53866)]:
+        filename = os.path.join(DIRNAME, name)
+        assert trebuchet(filename, engine="mmap") == expected
+        assert sum(sum_mmap_chunk(filename, start, end) for start, end in chunk_offsets(filename, 3)) == expected
+
+
+def test_part_one_engines():
+    for name, expected in [("example.txt", 142), ("input.txt", 54159)]:
+        filename = os.path.join(DIRNAME, name)
+        assert trebuchet(filename, part=1, engine="python") == expected
+        assert trebuchet(filename, part=1, engine="numpy") == expected
+        assert trebuchet(filename, part=1, engine="numpy", workers=3) == expected
+
+
+def test_numpy_engine():
+    pytest.importorskip("numpy")
+    filename = os.path.join(DIRNAME, "input.txt")
+    chunks = chunk_offsets(filename, 5)
+    assert sum(sum_numpy_chunk(filename, start, end) for start, end in chunks) == 54159
+
+
+def test_numpy_engine_falls_back_without_numpy(monkeypatch):
+    import trebuchet as module
+
+    monkeypatch.setattr(module, "np", None)
+    assert trebuchet(os.path.join(DIRNAME, "input.txt"), part=1, engine="numpy") == 54159
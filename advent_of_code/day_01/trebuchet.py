@@ -1,4 +1,15 @@
+import argparse
+import mmap
+import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy engine falls back to pure python
+    np = None
 
 digits = {
     "one": 1,
@@ -24,43 +35,218 @@ def find_digit(line, index):
     return None, index + 1
 
 
-def trebuchet(filename):
-    sum = 0
-    # Read the input file
-    with open(filename) as f:
-        lines = f.readlines()
+# single pattern for digits and spelled digits, the first digit is searched from the left
+DIGIT_PATTERN = re.compile(r"\d|" + "|".join(digits))
+DIGITS_ONLY_PATTERN = re.compile(r"\d")
+
+# byte patterns for the mmap engine, greedy ".*" backtracks from the line end, so it finds the last digit
+FIRST_BYTES_PATTERN = re.compile(rb"\d|" + "|".join(digits).encode())
+LAST_BYTES_PATTERN = re.compile(rb".*(\d|" + "|".join(digits).encode() + rb")")
+BYTES_DIGITS = {**{str(value).encode(): value for value in range(10)}, **{k.encode(): v for k, v in digits.items()}}
+
+
+def find_last_digit(line: str, spelled: bool = True) -> Optional[int]:
+    # index walks back from the line end, so only the tail after the last digit is visited and nothing is copied,
+    # a spelled digit is found at the index of its last letter, so "oneight" ends with "eight"
+    for index in range(len(line) - 1, -1, -1):
+        if line[index].isdigit():
+            return int(line[index])
+
+        if spelled:
+            for digit, value in digits.items():
+                if line.endswith(digit, 0, index + 1):
+                    return value
+
+    return None
+
+
+def find_first_and_last_digit(line: str) -> Tuple[Optional[int], Optional[int]]:
+    first = DIGIT_PATTERN.search(line)
+    if first is None:
+        return None, None
+
+    first_token = first.group()
+    first_digit = int(first_token) if first_token.isdigit() else digits[first_token]
+
+    return first_digit, find_last_digit(line)
+
+
+def calibration_value(line: str) -> Optional[int]:
+    first_digit, last_digit = find_first_and_last_digit(line)
+    if first_digit is None:
+        return None
 
-    first_digit = None
-    last_digit = None
+    return 10 * first_digit + last_digit
 
-    # Parse the input file
+
+def digits_value(line: str) -> Optional[int]:
+    # part one, spelled digits are not counted
+    first = DIGITS_ONLY_PATTERN.search(line)
+    if first is None:
+        return None
+
+    return 10 * int(first.group()) + find_last_digit(line, spelled=False)
+
+
+def sum_calibration_values(lines: Iterable[str], verbose: bool = False, part: int = 2) -> int:
+    # lines are consumed one by one, so any iterable (open file, stdin, generator) is processed in constant memory
+    sum = 0
     for line in lines:
-        index = 0
         line = line.rstrip()
-        while index < len(line):
-            digit, index = find_digit(line, index)
-            if digit is None:
-                continue
-            if first_digit is None:
-                first_digit = digit
+        value = calibration_value(line) if part == 2 else digits_value(line)
+        if value is None:
+            continue
+
+        if verbose:
+            print(f"Found number: {value}, in line: {line}")
+
+        sum += value
+
+    return sum
+
+
+def chunk_offsets(filename: str, chunks: int) -> List[Tuple[int, int]]:
+    # split file into byte ranges of similar size, every range starts right after a newline
+    size = os.path.getsize(filename)
+    offsets = [0]
+    with open(filename, "rb") as f:
+        for i in range(1, chunks):
+            f.seek(max(size * i // chunks, offsets[-1]))
+            if f.tell() > 0:
+                f.seek(f.tell() - 1)
+                f.readline()
+            offsets.append(f.tell())
+    offsets.append(size)
+
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if start < end]
+
+
+def read_lines(filename: str, start: int, end: int) -> Iterator[str]:
+    position = start
+    with open(filename, "rb") as f:
+        f.seek(start)
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode()
 
-            last_digit = digit
 
-        print(f"Found number: {10 * first_digit + last_digit}, in line: {line}")
+def sum_chunk(filename: str, start: int, end: int, verbose: bool = False) -> int:
+    return sum_calibration_values(read_lines(filename, start, end), verbose)
 
-        sum += 10 * first_digit + last_digit
-        first_digit = None
-        last_digit = None
+
+def sum_mmap_chunk(filename: str, start: int, end: int, verbose: bool = False) -> int:
+    # scan raw bytes of memory mapped file, no line is decoded to str unless verbose is set
+    sum = 0
+    if start >= end:
+        return sum
+
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        position = start
+        while position < end:
+            line_end = buffer.find(b"\n", position, end)
+            if line_end == -1:
+                line_end = end
+
+            first = FIRST_BYTES_PATTERN.search(buffer, position, line_end)
+            if first is not None:
+                last = LAST_BYTES_PATTERN.match(buffer, position, line_end)
+                value = 10 * BYTES_DIGITS[first.group()] + BYTES_DIGITS[last.group(1)]
+                if verbose:
+                    print(f"Found number: {value}, in line: {buffer[position:line_end].decode().rstrip()}")
+                sum += value
+
+            position = line_end + 1
+
+    return sum
+
+
+def sum_digits_chunk(filename: str, start: int, end: int, verbose: bool = False) -> int:
+    return sum_calibration_values(read_lines(filename, start, end), verbose, part=1)
+
+
+def sum_numpy_chunk(filename: str, start: int, end: int, verbose: bool = False) -> int:
+    # part one only, first and last digit of every line are found with array operations over the whole chunk
+    if np is None or verbose:
+        return sum_digits_chunk(filename, start, end, verbose)
+
+    with open(filename, "rb") as f:
+        f.seek(start)
+        data = np.fromfile(f, dtype=np.uint8, count=end - start)
+
+    line_ends = np.flatnonzero(data == ord("\n"))
+    if len(data) > 0 and data[-1] != ord("\n"):
+        line_ends = np.append(line_ends, len(data))
+
+    digit_positions = np.flatnonzero((data >= ord("0")) & (data <= ord("9")))
+    if len(digit_positions) == 0:
+        return 0
+
+    values = data[digit_positions].astype(np.int64) - ord("0")
+    line_of_digit = np.searchsorted(line_ends, digit_positions)
+    is_first = np.r_[True, line_of_digit[1:] != line_of_digit[:-1]]
+    is_last = np.r_[line_of_digit[1:] != line_of_digit[:-1], True]
+
+    return int(10 * values[is_first].sum() + values[is_last].sum())
+
+
+# part two engines, digits and spelled digits
+ENGINES: Dict[str, Callable[[str, int, int, bool], int]] = {
+    "lines": sum_chunk,
+    "mmap": sum_mmap_chunk,
+}
+
+# part one engines, digits only
+PART_ONE_ENGINES: Dict[str, Callable[[str, int, int, bool], int]] = {
+    "python": sum_digits_chunk,
+    "numpy": sum_numpy_chunk,
+}
+
+
+def parallel_sum(
+    filename: str, workers: int, engine: Callable[[str, int, int, bool], int], verbose: bool = False
+) -> int:
+    chunks = chunk_offsets(filename, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(engine, filename, start, end, verbose) for start, end in chunks]
+        return sum(future.result() for future in futures)
+
+
+def trebuchet(filename, verbose: bool = False, workers: int = 1, engine: Optional[str] = None, part: int = 2) -> int:
+    engines = ENGINES if part == 2 else PART_ONE_ENGINES
+    engine_function = engines[engine] if engine is not None else next(iter(engines.values()))
+
+    if filename == "-":
+        sum = sum_calibration_values(sys.stdin, verbose, part)
+    elif workers > 1:
+        sum = parallel_sum(filename, workers, engine_function, verbose)
+    else:
+        sum = engine_function(filename, 0, os.path.getsize(filename), verbose)
 
     print(f"Final sum from file: {filename} is {sum}")
+    return sum
 
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python gear_ratios.py <filename>")
-        sys.exit(1)
-
-    trebuchet(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Sum calibration values of the trebuchet document.")
+    parser.add_argument("filename", help="input file, use - to read from stdin")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print calibration value of every line")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="number of processes, stdin is always sequential")
+    parser.add_argument("-p", "--part", type=int, choices=[1, 2], default=2, help="1 counts digits only")
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=[*ENGINES, *PART_ONE_ENGINES],
+        help=f"how the file is scanned, part one: {', '.join(PART_ONE_ENGINES)}, part two: {', '.join(ENGINES)}",
+    )
+    args = parser.parse_args()
+
+    if args.engine is not None and args.engine not in (ENGINES if args.part == 2 else PART_ONE_ENGINES):
+        parser.error(f"engine {args.engine} can not solve part {args.part}")
+
+    return trebuchet(args.filename, args.verbose, args.workers, args.engine, args.part)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from cube_onundrum import COLORS, GameIndex, cube_onundrum, parse_games_columnar
+
+
+def generate_games(filename: str, games: int, seed: int = 2023) -> None:
+    # games with 1 to 6 draws, every draw has 1 to 3 colors with up to 20 cubes
+    rnd = random.Random(seed)
+    colors = list(COLORS)
+    with open(filename, "w") as f:
+        for game_id in range(1, games + 1):
+            draws = []
+            for _ in range(rnd.randint(1, 6)):
+                cubes = rnd.sample(colors, rnd.randint(1, 3))
+                draws.append(", ".join(f"{rnd.randint(1, 20)} {color}" for color in cubes))
+            f.write(f"Game {game_id}: {'; '.join(draws)}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark day 2 solvers on generated games.")
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=2023)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "games.txt")
+        generate_games(filename, args.games, args.seed)
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            cube_onundrum(filename, quiet=True, workers=workers)
+            print(f"workers: {workers:2d}, time: {time.perf_counter() - start:8.3f} s")
+
+        start = time.perf_counter()
+        with open(filename) as f:
+            index = GameIndex.from_lines(f)
+        index.possible_sums([(red, green, blue) for red in range(21) for green in range(21) for blue in range(21)])
+        print(f"index and 9261 limits: {time.perf_counter() - start:8.3f} s")
+
+        start = time.perf_counter()
+        with open(filename) as f:
+            parse_games_columnar(f).max_cubes()
+        print(f"columnar store: {time.perf_counter() - start:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,17 @@
+import argparse
+import os
 import re
-from dataclasses import dataclass
-from typing import List
+import sys
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # columnar store works also with plain arrays
+    np = None
 
 
 FILENAME = "input.txt"
@@ -9,15 +20,24 @@ TOTAL_RED_CUBES = 12
 TOTAL_GREEN_CUBES = 13
 TOTAL_BLUE_CUBES = 14
 
+# bag limits as (red, green, blue)
+Limits = Tuple[int, int, int]
+DEFAULT_LIMITS: Limits = (TOTAL_RED_CUBES, TOTAL_GREEN_CUBES, TOTAL_BLUE_CUBES)
 
-@dataclass
+COLORS = {"red": 0, "green": 1, "blue": 2}
+
+# one pattern for all tokens of the line: game id, cube count with color and set separator
+TOKEN_PATTERN = re.compile(r"Game (?P<game_id>\d+)|(?P<count>\d+) (?P<color>[a-z]+)|(?P<separator>;)")
+
+
+@dataclass(slots=True)
 class CubeSet:
     red: int = 0
     green: int = 0
     blue: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Game:
     game_id: int
     cube_sets: List[CubeSet]
@@ -55,9 +75,41 @@ def create_set(set: str) -> CubeSet:
     return cube_set
 
 
-def is_game_possible(game: Game) -> bool:
+def tokenize_game(line: str) -> Iterator[Tuple[int, int, int, str]]:
+    # yields (game_id, set_index, count, color) for every cube in the line without creating CubeSet objects
+    game_id = None
+    set_index = 0
+    for match in TOKEN_PATTERN.finditer(line):
+        if match.group("separator") is not None:
+            set_index += 1
+        elif match.group("game_id") is not None:
+            game_id = int(match.group("game_id"))
+        else:
+            yield game_id, set_index, int(match.group("count")), match.group("color")
+
+
+def scan_game(line: str, limits: Limits = DEFAULT_LIMITS) -> Tuple[int, int, int, int, bool]:
+    # single pass over the line, returns game id, maximum of every color and if the game is possible
+    game_id = None
+    maximum = [0, 0, 0]
+    for game_id, _, count, color in tokenize_game(line):
+        if color not in COLORS:
+            raise ValueError(f"Unknown color: {color}")
+        index = COLORS[color]
+        if count > maximum[index]:
+            maximum[index] = count
+
+    if game_id is None:
+        raise ValueError(f"Game without draws: {line.strip()}")
+
+    red, green, blue = maximum
+    possible = red <= limits[0] and green <= limits[1] and blue <= limits[2]
+    return game_id, red, green, blue, possible
+
+
+def is_game_possible(game: Game, limits: Limits = DEFAULT_LIMITS) -> bool:
     for set_ in game.cube_sets:
-        if set_.red > TOTAL_RED_CUBES or set_.green > TOTAL_GREEN_CUBES or set_.blue > TOTAL_BLUE_CUBES:
+        if set_.red > limits[0] or set_.green > limits[1] or set_.blue > limits[2]:
             return False
 
     return True
@@ -71,29 +123,239 @@ def minimum_playable_cubes(game: Game) -> int:
     return max_red * max_green * max_blue
 
 
-def main():
+@dataclass
+class GameColumns:
+    # all draws of all games in flat typed arrays, draws of game i are in range offsets[i]:offsets[i + 1]
+    game_ids: array = field(default_factory=lambda: array("I"))
+    offsets: array = field(default_factory=lambda: array("I", [0]))
+    red: array = field(default_factory=lambda: array("H"))
+    green: array = field(default_factory=lambda: array("H"))
+    blue: array = field(default_factory=lambda: array("H"))
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def append(self, game: Game) -> None:
+        if not game.cube_sets:
+            raise ValueError(f"Game without draws: {game.game_id}")
+
+        self.game_ids.append(game.game_id)
+        for set_ in game.cube_sets:
+            self.red.append(set_.red)
+            self.green.append(set_.green)
+            self.blue.append(set_.blue)
+        self.offsets.append(len(self.red))
+
+    def append_line(self, line: str) -> None:
+        # same as append(parse_game(line)) but filled directly from tokens, the game is added only after its draws
+        # are parsed, so a rejected line leaves the columns unchanged
+        draws: List[List[int]] = []
+        game_id = current_set = None
+        for game_id, set_index, count, color in tokenize_game(line):
+            if set_index != current_set:
+                draws.append([0, 0, 0])
+                current_set = set_index
+            if color not in COLORS:
+                raise ValueError(f"Unknown color: {color}")
+            draws[-1][COLORS[color]] = count
+
+        if not draws:
+            raise ValueError(f"Game without draws: {line.strip()}")
+
+        self.game_ids.append(game_id)
+        for red, green, blue in draws:
+            self.red.append(red)
+            self.green.append(green)
+            self.blue.append(blue)
+        self.offsets.append(len(self.red))
+
+    def max_cubes(self) -> Tuple[List[int], List[int], List[int]]:
+        # maximum of every color per game
+        if np is not None and len(self) > 0:
+            starts = np.frombuffer(self.offsets, dtype=np.uint32)[:-1]
+            return tuple(
+                np.maximum.reduceat(np.frombuffer(column, dtype=np.uint16), starts).tolist()
+                for column in (self.red, self.green, self.blue)
+            )
+
+        bounds = list(zip(self.offsets, self.offsets[1:]))
+        return tuple(
+            [max(column[start:end]) for start, end in bounds] for column in (self.red, self.green, self.blue)
+        )
+
+
+def parse_games_columnar(lines: Iterable[str]) -> GameColumns:
+    columns = GameColumns()
+    for line in lines:
+        if line.strip():
+            columns.append_line(line)
+
+    return columns
+
+
+def games_possible(columns: GameColumns, limits: Limits = DEFAULT_LIMITS) -> List[bool]:
+    max_red, max_green, max_blue = columns.max_cubes()
+    return [
+        red <= limits[0] and green <= limits[1] and blue <= limits[2]
+        for red, green, blue in zip(max_red, max_green, max_blue)
+    ]
+
+
+def minimum_playable_cubes_columnar(columns: GameColumns) -> List[int]:
+    return [red * green * blue for red, green, blue in zip(*columns.max_cubes())]
+
+
+@dataclass
+class GameIndex:
+    # maximum of every color per game sorted by red, so the games with red under the limit are a prefix
+    game_ids: List[int]
+    red: List[int]
+    green: List[int]
+    blue: List[int]
+
+    def __post_init__(self) -> None:
+        order = sorted(range(len(self.game_ids)), key=lambda i: self.red[i])
+        self.game_ids = [self.game_ids[i] for i in order]
+        self.red = [self.red[i] for i in order]
+        self.green = [self.green[i] for i in order]
+        self.blue = [self.blue[i] for i in order]
+        self._cache: Dict[Limits, List[int]] = {}
+
+    @classmethod
+    def from_columns(cls, columns: GameColumns) -> "GameIndex":
+        return cls(list(columns.game_ids), *columns.max_cubes())
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "GameIndex":
+        games = [scan_game(line)[:4] for line in lines if line.strip()]
+        return cls(*(list(column) for column in zip(*games))) if games else cls([], [], [], [])
+
+    def possible_games(self, limits: Limits = DEFAULT_LIMITS) -> List[int]:
+        if limits not in self._cache:
+            red, green, blue = limits
+            prefix = bisect_right(self.red, red)
+            self._cache[limits] = [
+                self.game_ids[i] for i in range(prefix) if self.green[i] <= green and self.blue[i] <= blue
+            ]
+
+        return self._cache[limits]
+
+    def possible_sum(self, limits: Limits = DEFAULT_LIMITS) -> int:
+        return sum(self.possible_games(limits))
+
+    def possible_sums(self, batch: Iterable[Limits], block: int = 256) -> List[int]:
+        # sums of possible game ids for every limits in batch
+        batch = list(batch)
+        if np is None or not self.game_ids:
+            return [self.possible_sum(limits) for limits in batch]
+
+        game_ids = np.array(self.game_ids, dtype=np.int64)
+        columns = [np.array(column, dtype=np.int64)[:, None] for column in (self.red, self.green, self.blue)]
+        queries = np.array(batch, dtype=np.int64).reshape(-1, 3)
+        sums = []
+        # games x limits masks are built for a block of limits at once to keep memory bounded
+        for first in range(0, len(queries), block):
+            queries_block = queries[first:first + block]
+            mask = np.ones((len(game_ids), len(queries_block)), dtype=bool)
+            for column, limit in zip(columns, queries_block.T):
+                mask &= column <= limit[None, :]
+            sums.extend((game_ids @ mask).tolist())
+
+        return sums
+
+
+def sum_games(lines: Iterable[str], quiet: bool = False, limits: Limits = DEFAULT_LIMITS) -> Tuple[int, int]:
+    # lines are consumed one by one, returns sum of possible game ids and sum of minimum playable cubes
     sum_posible_games = 0
     sum_playable_cubes = 0
 
-    # Read the input file
-    with open(FILENAME) as f:
-        lines = f.readlines()
-
     for line in lines:
-        game = parse_game(line)
-        playable_cubes = minimum_playable_cubes(game)
+        if not line.strip():
+            continue
+
+        game_id, red, green, blue, playable = scan_game(line, limits)
+        playable_cubes = red * green * blue
         sum_playable_cubes += playable_cubes
-        playable = is_game_possible(game)
         if playable:
-            sum_posible_games += game.game_id
+            sum_posible_games += game_id
 
-        print(
-            f"Game {game.game_id} is {'possible' if playable else 'not possible'}, "
-            f"minimum playable cubes: {playable_cubes}"
-        )
+        if not quiet:
+            print(
+                f"Game {game_id} is {'possible' if playable else 'not possible'}, "
+                f"minimum playable cubes: {playable_cubes}"
+            )
+
+    return sum_posible_games, sum_playable_cubes
+
+
+def chunk_offsets(filename: str, chunks: int) -> List[Tuple[int, int]]:
+    # split file into byte ranges of similar size, every range starts right after a newline
+    size = os.path.getsize(filename)
+    offsets = [0]
+    with open(filename, "rb") as f:
+        for i in range(1, chunks):
+            f.seek(max(size * i // chunks, offsets[-1]))
+            if f.tell() > 0:
+                f.seek(f.tell() - 1)
+                f.readline()
+            offsets.append(f.tell())
+    offsets.append(size)
+
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if start < end]
+
+
+def read_lines(filename: str, start: int, end: int) -> Iterator[str]:
+    position = start
+    with open(filename, "rb") as f:
+        f.seek(start)
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode()
+
+
+def sum_chunk(
+    filename: str, start: int, end: int, quiet: bool = False, limits: Limits = DEFAULT_LIMITS
+) -> Tuple[int, int]:
+    return sum_games(read_lines(filename, start, end), quiet, limits)
+
+
+def cube_onundrum(
+    filename: str, quiet: bool = False, workers: int = 1, limits: Limits = DEFAULT_LIMITS
+) -> Tuple[int, int]:
+    if filename == "-":
+        sum_posible_games, sum_playable_cubes = sum_games(sys.stdin, quiet, limits)
+    elif workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(sum_chunk, filename, start, end, quiet, limits)
+                for start, end in chunk_offsets(filename, workers)
+            ]
+            partial_sums = [future.result() for future in futures]
+        sum_posible_games = sum(possible for possible, _ in partial_sums)
+        sum_playable_cubes = sum(playable for _, playable in partial_sums)
+    else:
+        with open(filename) as f:
+            sum_posible_games, sum_playable_cubes = sum_games(f, quiet, limits)
+
+    print(f"Final sum possible games from file: {filename} is {sum_posible_games}")
+    print(f"Final sum playable cubes from file: {filename} is {sum_playable_cubes}")
+    return sum_posible_games, sum_playable_cubes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sum possible games and minimum playable cubes.")
+    parser.add_argument("filename", nargs="?", default=FILENAME, help="input file, use - to read from stdin")
+    parser.add_argument("-q", "--quiet", action="store_true", help="print only final sums")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="number of processes, stdin is always sequential")
+    parser.add_argument(
+        "-l", "--limits", type=int, nargs=3, default=DEFAULT_LIMITS, metavar=("RED", "GREEN", "BLUE"), help="bag limits"
+    )
+    args = parser.parse_args()
 
-    print(f"Final sum possible games from file: {FILENAME} is {sum_posible_games}")
-    print(f"Final sum playable cubes from file: {FILENAME} is {sum_playable_cubes}")
+    return cube_onundrum(args.filename, args.quiet, args.workers, tuple(args.limits))
 
 
 if __name__ == "__main__":
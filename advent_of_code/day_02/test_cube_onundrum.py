@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+from cube_onundrum import (
+    DEFAULT_LIMITS,
+    Game,
+    GameColumns,
+    GameIndex,
+    cube_onundrum,
+    games_possible,
+    is_game_possible,
+    minimum_playable_cubes,
+    minimum_playable_cubes_columnar,
+    parse_game,
+    parse_games_columnar,
+    scan_game,
+    sum_chunk,
+    tokenize_game,
+)
+
+DIRNAME = os.path.dirname(__file__)
+
+
+def read_lines(name):
+    with open(os.path.join(DIRNAME, name)) as f:
+        return f.readlines()
+
+
+def test_columnar_matches_objects():
+    for name in ["example.txt", "input.txt"]:
+        lines = read_lines(name)
+        games = [parse_game(line) for line in lines]
+        columns = parse_games_columnar(lines)
+
+        assert list(columns.game_ids) == [game.game_id for game in games]
+        assert games_possible(columns) == [is_game_possible(game) for game in games]
+        assert minimum_playable_cubes_columnar(columns) == [minimum_playable_cubes(game) for game in games]
+
+
+def test_columnar_example():
+    columns = parse_games_columnar(read_lines("example.txt"))
+    assert sum(game_id for game_id, possible in zip(columns.game_ids, games_possible(columns)) if possible) == 8
+    assert sum(minimum_playable_cubes_columnar(columns)) == 2286
+
+
+def test_columnar_without_numpy(monkeypatch):
+    import cube_onundrum
+
+    monkeypatch.setattr(cube_onundrum, "np", None)
+    test_columnar_matches_objects()
+
+
+def test_columnar_rejects_game_without_draws():
+    lines = ["Game 1: 3 red\n", "Game 2: \n", "Game 3: 1 blue\n"]
+    with pytest.raises(ValueError):
+        parse_games_columnar(lines)
+    with pytest.raises(ValueError):
+        scan_game(lines[1])
+
+    columns = GameColumns()
+    for line in [lines[0], lines[2]]:
+        columns.append_line(line)
+    with pytest.raises(ValueError):
+        columns.append_line(lines[1])
+    with pytest.raises(ValueError):
+        columns.append(Game(game_id=2, cube_sets=[]))
+
+    # rejected games leave ids and offsets in step
+    assert list(columns.game_ids) == [1, 3]
+    assert list(columns.offsets) == [0, 1, 2]
+    assert columns.max_cubes() == ([3, 0], [0, 0], [0, 1])
+
+    objects = GameColumns()
+    for line in [lines[0], lines[2]]:
+        objects.append(parse_game(line))
+    assert objects == columns
+
+
+def test_tokenize_game():
+    line = "Game 7: 3 blue, 4 red; 1 red, 2 green, 6 blue; 2 green"
+    assert list(tokenize_game(line)) == [
+        (7, 0, 3, "blue"),
+        (7, 0, 4, "red"),
+        (7, 1, 1, "red"),
+        (7, 1, 2, "green"),
+        (7, 1, 6, "blue"),
+        (7, 2, 2, "green"),
+    ]
+
+
+def test_scan_game_matches_objects():
+    for line in read_lines("input.txt"):
+        game = parse_game(line)
+        game_id, red, green, blue, possible = scan_game(line)
+        assert game_id == game.game_id
+        assert red * green * blue == minimum_playable_cubes(game)
+        assert possible == is_game_possible(game)
+
+
+def test_game_index_batch():
+    lines = read_lines("input.txt")
+    games = [parse_game(line) for line in lines]
+    index = GameIndex.from_lines(lines)
+    assert index == GameIndex.from_columns(parse_games_columnar(lines))
+
+    batch = [(red, green, blue) for red in range(0, 21, 4) for green in range(0, 21, 5) for blue in range(0, 21, 3)]
+    batch.append(DEFAULT_LIMITS)
+    expected = [sum(game.game_id for game in games if is_game_possible(game, limits)) for limits in batch]
+    assert [index.possible_sum(limits) for limits in batch] == expected
+    assert index.possible_sums(batch, block=7) == expected
+    assert index.possible_sum() == 2716
+
+
+def test_cube_onundrum_workers():
+    filename = os.path.join(DIRNAME, "input.txt")
+    assert cube_onundrum(filename, quiet=True) == (2716, 72227)
+    assert cube_onundrum(filename, quiet=True, workers=3) == (2716, 72227)
+    assert sum_chunk(filename, 0, os.path.getsize(filename), quiet=True, limits=(20, 20, 20)) == (
+        GameIndex.from_lines(read_lines("input.txt")).possible_sum((20, 20, 20)),
+        72227,
+    )
@@ -0,0 +1,58 @@
+import argparse
+import random
+import time
+from typing import List
+
+from gear_ratios import ENGINES, solve_parallel, valid_syms
+
+
+def generate_schematic(rows: int, columns: int, seed: int = 2023) -> List[str]:
+    # mostly empty cells with numbers of 1 to 3 digits and symbols, density similar to the puzzle input
+    rnd = random.Random(seed)
+    # every number is followed by a non digit, so two numbers never merge into a longer one
+    numbers = [str(rnd.randint(1, 999)) + rnd.choice("......*#+") for _ in range(200)]
+    tokens = ["."] * 12 + ["..", "..."] * 3 + numbers + sorted(valid_syms)
+    weights = [1] * 18 + [0.03] * 200 + [0.3] * len(valid_syms)
+    lines = []
+    for _ in range(rows):
+        line = "".join(rnd.choices(tokens, weights, k=columns // 2))
+        while len(line) < columns:
+            line += "".join(rnd.choices(tokens, weights, k=columns // 10 + 1))
+        lines.append(line[:columns] + "\n")
+
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark day 3 engines on generated schematic.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=10000)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--workers", type=int, nargs="*", default=[], help="also run banded index engine")
+    parser.add_argument("--seed", type=int, default=2023)
+    args = parser.parse_args()
+
+    lines = generate_schematic(args.rows, args.columns, args.seed)
+    cells = args.rows * args.columns
+
+    runs = [(engine, ENGINES[engine]) for engine in args.engines]
+    for workers in args.workers:
+        runs.append((f"bands{workers}", lambda lines, workers=workers: solve_parallel(lines, workers)))
+
+    results = {}
+    for engine, solver in runs:
+        start = time.perf_counter()
+        results[engine] = solver(lines)
+        elapsed = time.perf_counter() - start
+        print(
+            f"engine: {engine:6s}, time: {elapsed:8.3f} s, "
+            f"throughput: {cells / elapsed / 1e6:8.2f} Mcells/s, result: {results[engine]}"
+        )
+
+    # scan engine adds a number only to the first symbol it touches, so its gear sum is compared only to itself
+    assert len({part_sum for part_sum, _ in results.values()}) == 1, f"part sums differ: {results}"
+    assert len({result for engine, result in results.items() if engine != "scan"}) <= 1, f"results differ: {results}"
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,27 @@
-import sys
-from typing import Dict, Tuple, List
+import argparse
+import re
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, Tuple, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy engine falls back to solve()
+    np = None
 
-all_syms = set()
 valid_syms = set(['&', '@', '-', '$', '#', '+', '/', '%', '*', '='])
-valid_numbers = set()
-invalid_numbers = set()
-gear: Dict[Tuple[int, int], List[int]] = dict()
+
+NUMBER_PATTERN = re.compile(r"[0-9]+")
+SYMBOL_PATTERN = re.compile("[" + re.escape("".join(sorted(valid_syms))) + "]")
+
+
+@dataclass
+class SchematicState:
+    # everything collected during one evaluation, nothing is shared between calls
+    part_sum: int = 0
+    gear_sum: int = 0
+    gear: Dict[Tuple[int, int], List[int]] = field(default_factory=dict)
 
 
 def find_number(line, index):
@@ -19,15 +35,14 @@ def find_number(line, index):
 
 
 def read_number(line, index):
-    str_number = ""
-    while line[index].isdigit():
-        str_number += line[index]
+    start = index
+    while index < len(line) and line[index].isdigit():
         index += 1
 
-    return int(str_number), index, len(str_number)
+    return int(line[start:index]), index, index - start
 
 
-def check_number(number, lines, line_index, index, length):
+def check_number(number, lines, line_index, index, length, state: SchematicState):
     for x in range(index - 1, index + length + 1):
         for y in range(line_index - 1, line_index + 2):
             if x < 0 or y < 0 or y >= len(lines) or x >= len(lines[y]):
@@ -35,13 +50,12 @@ def check_number(number, lines, line_index, index, length):
 
             try:
                 symbol: str = lines[y][x]
-                all_syms.add(symbol)
                 if symbol in valid_syms:
                     if symbol == '*':
-                        if (x, y) in gear:
-                            gear[(x, y)].append(number)
+                        if (x, y) in state.gear:
+                            state.gear[(x, y)].append(number)
                         else:
-                            gear[(x, y)] = [number]
+                            state.gear[(x, y)] = [number]
 
                     return True
                 else:
@@ -53,45 +67,227 @@ def check_number(number, lines, line_index, index, length):
     return False
 
 
-def main():
-    sum = 0
-    if len(sys.argv) != 2:
-        print("Usage: python gear_ratios.py <filename>")
-        sys.exit(1)
+@dataclass
+class Row:
+    # sorted columns of symbols and stars, numbers as (start, end, number) sorted by start, end is exclusive
+    symbols: List[int] = field(default_factory=list)
+    stars: List[int] = field(default_factory=list)
+    starts: List[int] = field(default_factory=list)
+    numbers: List[Tuple[int, int, int]] = field(default_factory=list)
 
-    filename = sys.argv[1]
-    line_index = 0
 
-    # Read the input file
-    with open(filename) as f:
-        lines = f.readlines()
+def index_row(line: str) -> Row:
+    # spans of digit runs and symbols are taken directly from regex matches
+    row = Row()
+    for match in SYMBOL_PATTERN.finditer(line):
+        row.symbols.append(match.start())
+        if match.group() == '*':
+            row.stars.append(match.start())
+
+    for match in NUMBER_PATTERN.finditer(line):
+        start, end = match.span()
+        row.starts.append(start)
+        row.numbers.append((start, end, int(match.group())))
+
+    return row
+
+
+def is_part_number(rows: List[Row], start: int, end: int) -> bool:
+    # any symbol in columns start - 1 .. end of the rows around the number
+    for row in rows:
+        i = bisect_left(row.symbols, start - 1)
+        if i < len(row.symbols) and row.symbols[i] <= end:
+            return True
+
+    return False
+
+
+def adjacent_numbers(rows: List[Row], x: int) -> List[int]:
+    # numbers which touch column x in any of the rows, at most three per row
+    numbers = []
+    for row in rows:
+        i = bisect_right(row.starts, x + 1) - 1
+        while i >= 0 and row.numbers[i][1] >= x:
+            numbers.append(row.numbers[i][2])
+            i -= 1
+
+    return numbers
 
+
+def process_row(above: Optional[Row], row: Row, below: Optional[Row]) -> Tuple[int, int]:
+    # part numbers of the row and gear ratios of stars in the row, so every row can be evaluated independently
+    rows = [r for r in (above, row, below) if r is not None]
+
+    part_sum = 0
+    for start, end, number in row.numbers:
+        if is_part_number(rows, start, end):
+            part_sum += number
+
+    gear_sum = 0
+    for x in row.stars:
+        numbers = adjacent_numbers(rows, x)
+        if len(numbers) == 2:
+            gear_sum += numbers[0] * numbers[1]
+
+    return part_sum, gear_sum
+
+
+def process_rows(lines: Iterable[str]) -> Iterator[Tuple[int, int]]:
+    # sliding window of three rows, a row is evaluated and dropped as soon as the row below it is indexed,
+    # so memory does not depend on number of rows
+    above = None
+    row = None
     for line in lines:
+        below = index_row(line)
+        if row is not None:
+            yield process_row(above, row, below)
+        above, row = row, below
+
+    if row is not None:
+        yield process_row(above, row, None)
+
+
+def solve(lines: Iterable[str]) -> Tuple[int, int]:
+    # returns sum of part numbers and sum of gear ratios, all state is local to the call
+    part_sum = gear_sum = 0
+    for row_part_sum, row_gear_sum in process_rows(lines):
+        part_sum += row_part_sum
+        gear_sum += row_gear_sum
+
+    return part_sum, gear_sum
+
+
+def solve_band(band: List[str], above: Optional[str] = None, below: Optional[str] = None) -> Tuple[int, int]:
+    # rows of the band with one halo row on each side, halo rows are only neighbours and are not evaluated
+    lines = ([above] if above is not None else []) + band + ([below] if below is not None else [])
+    sums = list(process_rows(lines))
+    if above is not None:
+        sums = sums[1:]
+    if below is not None:
+        sums = sums[:-1]
+
+    return sum(part for part, _ in sums), sum(gear for _, gear in sums)
+
+
+def solve_parallel(lines: Iterable[str], workers: int = 4) -> Tuple[int, int]:
+    # numbers never span more rows and every gear belongs to the row of its star,
+    # so bands can be evaluated independently and the sums just added
+    lines = list(lines)
+    band_rows = max(1, -(-len(lines) // workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                solve_band,
+                lines[first:first + band_rows],
+                lines[first - 1] if first > 0 else None,
+                lines[first + band_rows] if first + band_rows < len(lines) else None,
+            )
+            for first in range(0, len(lines), band_rows)
+        ]
+        sums = [future.result() for future in futures]
+
+    return sum(part for part, _ in sums), sum(gear for _, gear in sums)
+
+
+def solve_by_scan(lines: Iterable[str]) -> Tuple[int, int]:
+    # original approach, every cell around every number is probed
+    lines = list(lines)
+    state = SchematicState()
+    for line_index, line in enumerate(lines):
         index = 0
         while (index := find_number(line, index)) is not None:
             number, index, length = read_number(line, index)
-            if check_number(number, lines, line_index, index-length, length):
-                # print(f"Found number: {number}")
-                valid_numbers.add(number)
-                sum += number
-            else:
-                # print(f"Found number: {number} but it is not valid")
-                invalid_numbers.add(number)
-                pass
+            if check_number(number, lines, line_index, index - length, length, state):
+                state.part_sum += number
 
-        line_index += 1
+    for numbers in state.gear.values():
+        if len(numbers) == 2:
+            state.gear_sum += numbers[0] * numbers[1]
 
-    print(f"Final sum from file: {filename} is {sum}")
-    # print(f"Symbols: {[s for s in all_syms if s.isdigit() is False]}")
-    # print(f"Valid numbers: {sorted(valid_numbers)}")
-    # print(f"Invalid numbers: {sorted(invalid_numbers)}")
+    return state.part_sum, state.gear_sum
 
-    gear_sum = 0
-    for point, numbers in gear.items():
-        if len(numbers) == 2:
-            gear_sum += numbers[0] * numbers[1]
-            print(f"Found gear at {point} with numbers {numbers}, ratio: {numbers[0] * numbers[1]}")
 
+def solve_numpy(lines: Iterable[str]) -> Tuple[int, int]:
+    # same as solve(), the schematic is processed as 2D array
+    lines = [line.rstrip("\n") for line in lines]
+    # the grid holds one byte per character, so only ASCII lines can be placed into it
+    if np is None or not lines or not all(line.isascii() for line in lines):
+        return solve(lines)
+
+    # pad the grid by one cell on every side, so neighbours never fall out of the grid and no digit run wraps rows
+    width = max(len(line) for line in lines) + 2
+    grid = np.full((len(lines) + 2, width), ord("."), dtype=np.uint8)
+    for y, line in enumerate(lines):
+        grid[y + 1, 1:len(line) + 1] = np.frombuffer(line.encode(), dtype=np.uint8)
+
+    # symbol mask dilated by 3x3 kernel
+    symbols = np.isin(grid, np.frombuffer("".join(valid_syms).encode(), dtype=np.uint8))
+    near = symbols.copy()
+    near[:, 1:] |= symbols[:, :-1]
+    near[:, :-1] |= symbols[:, 1:]
+    near_rows = near.copy()
+    near[1:] |= near_rows[:-1]
+    near[:-1] |= near_rows[1:]
+
+    # label digit runs of the flattened grid
+    digits = ((grid >= ord("0")) & (grid <= ord("9"))).ravel()
+    run_start = digits & ~np.r_[False, digits[:-1]]
+    labels = np.cumsum(run_start) - 1
+    labels[~digits] = -1
+
+    positions = np.flatnonzero(digits)
+    if len(positions) == 0:
+        return 0, 0
+    starts = np.flatnonzero(run_start[positions])
+    ends = np.r_[starts[1:], len(positions)]
+    # int64 holds all numbers of 18 digits, longer runs would silently wrap
+    if (ends - starts).max() > 18:
+        return solve(lines)
+    exponents = (ends - 1)[labels[positions]] - np.arange(len(positions))
+    weighted = (grid.ravel()[positions].astype(np.int64) - ord("0")) * np.power(10, exponents, dtype=np.int64)
+    values = np.add.reduceat(weighted, starts)
+
+    is_part = np.logical_or.reduceat(near.ravel()[positions], starts)
+    part_sum = int(values[is_part].sum())
+
+    # labels of the 9 cells around every star, every run is counted once
+    stars = np.flatnonzero(grid.ravel() == ord("*"))
+    offsets = np.array([dy * width + dx for dy in (-1, 0, 1) for dx in (-1, 0, 1)])
+    around = np.sort(labels[stars[:, None] + offsets[None, :]], axis=1)
+    around[:, 1:][around[:, 1:] == around[:, :-1]] = -1
+    gears = around[(around >= 0).sum(axis=1) == 2]
+    ratios = np.where(gears >= 0, values[np.maximum(gears, 0)], 1).prod(axis=1)
+
+    return part_sum, int(ratios.sum())
+
+
+ENGINES = {
+    "index": solve,
+    "scan": solve_by_scan,
+    "numpy": solve_numpy,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sum part numbers and gear ratios of the engine schematic.")
+    parser.add_argument("filename")
+    parser.add_argument("-e", "--engine", choices=ENGINES, default="index")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="split rows to bands for index engine")
+    args = parser.parse_args()
+
+    if args.workers > 1 and args.engine != "index":
+        parser.error(f"engine {args.engine} can not be split to bands, use index engine with --workers")
+
+    filename = args.filename
+
+    # Read the input file, index engine streams it line by line
+    with open(filename) as f:
+        if args.workers > 1:
+            sum, gear_sum = solve_parallel(f, args.workers)
+        else:
+            sum, gear_sum = ENGINES[args.engine](f)
+
+    print(f"Final sum from file: {filename} is {sum}")
     print(f"Gear sum: {gear_sum}")
 
 
@@ -0,0 +1,123 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from gear_ratios import (
+    adjacent_numbers,
+    index_row,
+    is_part_number,
+    main,
+    process_row,
+    process_rows,
+    read_number,
+    solve_band,
+    solve,
+    solve_by_scan,
+    solve_numpy,
+    solve_parallel,
+)
+
+DIRNAME = os.path.dirname(__file__)
+
+
+def read_lines(name):
+    with open(os.path.join(DIRNAME, name)) as f:
+        return f.readlines()
+
+
+def test_index_row():
+    row = index_row("617*...+.58.\n")
+    assert row.symbols == [3, 7]
+    assert row.stars == [3]
+    assert row.numbers == [(0, 3, 617), (9, 11, 58)]
+
+
+def test_symbol_index_lookups():
+    rows = [index_row(line) for line in ["467..114..\n", "...*......\n", "..35..633.\n"]]
+    assert is_part_number(rows, 0, 3)
+    assert not is_part_number(rows, 5, 8)
+    assert sorted(adjacent_numbers(rows, 3)) == [35, 467]
+
+
+def test_process_rows():
+    for name, expected in [("example.txt", (4361, 467835)), ("input.txt", (550934, 81997870))]:
+        rows = [index_row(line) for line in read_lines(name)]
+        sums = [
+            process_row(rows[i - 1] if i > 0 else None, row, rows[i + 1] if i + 1 < len(rows) else None)
+            for i, row in enumerate(rows)
+        ]
+        assert (sum(part for part, _ in sums), sum(gear for _, gear in sums)) == expected
+
+
+def test_solve_is_reentrant():
+    example = read_lines("example.txt")
+    schematic = read_lines("input.txt")
+    assert solve(example) == (4361, 467835)
+    assert solve(schematic) == (550934, 81997870)
+    assert solve(example) == (4361, 467835)
+    assert solve_by_scan(example) == solve_by_scan(example) == (4361, 467835)
+    assert solve_by_scan(schematic) == (550934, 81997870)
+
+
+def test_solve_in_threads():
+    schematics = [read_lines("example.txt"), read_lines("input.txt")] * 8
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(solve, schematics))
+
+    assert results == [(4361, 467835), (550934, 81997870)] * 8
+
+
+def test_solve_numpy():
+    for name in ["example.txt", "input.txt"]:
+        lines = read_lines(name)
+        assert solve_numpy(lines) == solve(lines)
+
+    assert solve_numpy(["12*3\n", "..4.\n", "5..."]) == solve(["12*3\n", "..4.\n", "5..."]) == (19, 0)
+    assert solve_numpy(["1.2\n", ".*.\n"]) == (3, 2)
+    # long digit runs and non-ASCII lines are solved by solve()
+    assert solve_numpy(["12345678901234567890*\n"]) == solve(["12345678901234567890*\n"]) == (12345678901234567890, 0)
+    assert solve_numpy(["123456789012345678*\n"]) == (123456789012345678, 0)
+    assert solve_numpy(["\u00e91*\n", ".2.\n"]) == solve(["\u00e91*\n", ".2.\n"]) == (3, 2)
+
+
+def test_process_rows_streams_lines():
+    def lines():
+        with open(os.path.join(DIRNAME, "input.txt")) as f:
+            yield from f
+
+    sums = list(process_rows(lines()))
+    assert len(sums) == 140
+    assert (sum(part for part, _ in sums), sum(gear for _, gear in sums)) == (550934, 81997870)
+    assert list(process_rows(["1*1\n"])) == [(2, 1)]
+    assert list(process_rows([])) == []
+
+
+def test_solve_parallel_matches_sequential():
+    lines = read_lines("input.txt")
+    expected = solve(lines)
+    for workers in [1, 2, 3, 7]:
+        assert solve_parallel(lines, workers) == expected
+
+    # bands of one row, every row is next to a band border
+    assert solve_parallel(read_lines("example.txt"), 10) == (4361, 467835)
+
+
+def test_solve_band_halo():
+    lines = read_lines("input.txt")
+    bands = [solve_band(lines[:50], None, lines[50]), solve_band(lines[50:], lines[49], None)]
+    assert (sum(part for part, _ in bands), sum(gear for _, gear in bands)) == (550934, 81997870)
+
+
+def test_read_number_at_line_end():
+    assert read_number("..123", 2) == (123, 5, 3)
+    assert index_row("..123").numbers == [(2, 5, 123)]
+    assert solve(["..12", "*..."]) == solve_by_scan(["..12", "*..."]) == (0, 0)
+    assert solve(["..12", ".*.."]) == solve_by_scan(["..12", ".*.."]) == (12, 0)
+
+
+def test_workers_only_with_index_engine(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["gear_ratios.py", os.path.join(DIRNAME, "example.txt"), "-e", "scan", "-w", "3"])
+    with pytest.raises(SystemExit):
+        main()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from scratchcards import count_copies, count_scratchcards_and_copies, parse_file
+
+
+def generate_cards(filename: str, cards: int, winning: int = 10, numbers: int = 25, seed: int = 2023) -> None:
+    # matches of the last cards are limited, so no card wins copies of cards after the end of the table
+    rnd = random.Random(seed)
+    population = range(1, 100)
+    with open(filename, "w") as f:
+        for card_id in range(1, cards + 1):
+            winning_numbers = rnd.sample(population, min(winning, cards - card_id))
+            card_numbers = rnd.sample(population, numbers)
+            f.write(
+                f"Card {card_id:7d}: {' '.join(f'{n:2d}' for n in winning_numbers)} | "
+                f"{' '.join(f'{n:2d}' for n in card_numbers)}\n"
+            )
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print(f"{label:24s} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark copies propagation of day 4 on generated cards.")
+    parser.add_argument("--cards", type=int, default=1000000)
+    parser.add_argument("--modulus", type=int, default=2**64, help="modulus of copies for the large input")
+    parser.add_argument("--compare-cards", type=int, default=20000, help="size of exact comparison with nested loop")
+    parser.add_argument("--winning", type=int, default=10, help="winning numbers per card, limits matches")
+    parser.add_argument("--numbers", type=int, default=25, help="numbers per card")
+    parser.add_argument("--seed", type=int, default=2023)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for cards_count, modulus in [(args.compare_cards, None), (args.cards, args.modulus)]:
+            filename = os.path.join(tmp, f"cards_{cards_count}.txt")
+            generate_cards(filename, cards_count, args.winning, args.numbers, args.seed)
+            cards = timed(f"parse {cards_count} cards", parse_file, filename)
+            matching = [card.count_matching() for card in cards.values()]
+            label = "difference array" if modulus is None else "difference array, mod"
+            fast = timed(label, count_copies, matching, modulus)
+            if modulus is None:
+                nested = timed("nested loop", count_scratchcards_and_copies, cards)
+                assert fast == nested, f"{fast} != {nested}"
+            print(f"copies: {fast if fast.bit_length() < 256 else f'{fast.bit_length()} bits number'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,46 @@
+import argparse
+import os
 import sys
 import re
-from typing import Dict, List
-from dataclasses import dataclass
+from collections import deque
+from functools import cached_property, lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError:  # match counts are computed from int bitmasks
+    np = None
+
+CARD_PATTERN = re.compile(r'Card\s+(?P<card_id>\d+):\s+(?P<winning_numbers>[0-9\s]+)\|\s+(?P<numbers>[0-9\s]+)')
+
+
+def to_mask(numbers: Iterable[int]) -> int:
+    # bit n is set when number n is present
+    mask = 0
+    for number in numbers:
+        mask |= 1 << number
+
+    return mask
 
 
 @dataclass
 class CardData:
     winning_numbers: List[int]
     numbers: List[int]
-    matching: int = 0
-    multiplier: int = 1
+    winning_mask: int = field(init=False, repr=False)
+    numbers_mask: int = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.winning_mask = to_mask(self.winning_numbers)
+        self.numbers_mask = to_mask(self.numbers)
+
+    def count_matching(self) -> int:
+        return (self.winning_mask & self.numbers_mask).bit_count()
+
+    @cached_property
+    def matching(self) -> int:
+        return self.count_matching()
 
 
 def parse_file(filename: str) -> Dict[int, CardData]:
@@ -17,8 +48,7 @@ def parse_file(filename: str) -> Dict[int, CardData]:
     with open(filename) as f:
         text = f.read()
 
-    pattern = re.compile(r'Card\s+(?P<card_id>\d+):\s+(?P<winning_numbers>[0-9\s]+)\|\s+(?P<numbers>[0-9\s]+)')
-    for match in pattern.finditer(text):
+    for match in CARD_PATTERN.finditer(text):
         card_id = int(match.group('card_id'))
         winning_numbers = [int(num) for num in match.group('winning_numbers').split()]
         numbers = [int(num) for num in match.group('numbers').split()]
@@ -27,43 +57,152 @@ def parse_file(filename: str) -> Dict[int, CardData]:
     return cards
 
 
-def count_points(card_data: CardData) -> int:
-    for win_num in card_data.winning_numbers:
-        if win_num in card_data.numbers:
-            card_data.matching += 1
+def iter_matches(lines: Iterable[str]) -> Iterator[Tuple[int, int]]:
+    # yields (card_id, matching) for every card line, nothing is kept between lines
+    for line in lines:
+        match = CARD_PATTERN.search(line)
+        if match is None:
+            continue
+
+        winning_mask = to_mask(int(num) for num in match.group('winning_numbers').split())
+        numbers_mask = to_mask(int(num) for num in match.group('numbers').split())
+        yield int(match.group('card_id')), (winning_mask & numbers_mask).bit_count()
+
+
+def score_stream(lines: Iterable[str], modulus: Optional[int] = None) -> Tuple[int, int]:
+    # both parts online, pending holds difference of copies for the next cards, so it is never longer than
+    # maximum matching + 1
+    points = 0
+    total = 0
+    running = 0
+    pending = deque()
+    for _, matching in iter_matches(lines):
+        running += pending.popleft() if pending else 0
+        copies = 1 + running
+        if modulus is not None:
+            copies %= modulus
+        total += copies
+        if matching > 0:
+            points += pow(2, matching - 1)
+            while len(pending) < matching + 1:
+                pending.append(0)
+            pending[0] += copies
+            pending[matching] -= copies
+
+    return points, total % modulus if modulus is not None else total
+
 
+def count_points(card_data: CardData) -> int:
     if card_data.matching == 0:
         return 0
     else:
         return pow(2, card_data.matching - 1)
 
 
+def count_matching_numpy(cards: Dict[int, CardData]) -> List[int]:
+    # match counts of all cards at once, every card is a row of boolean membership matrix
+    if np is None or not cards:
+        return [card_data.count_matching() for card_data in cards.values()]
+
+    cards_list = list(cards.values())
+    width = max(max(card.winning_numbers + card.numbers, default=0) for card in cards_list) + 1
+    winning = np.zeros((len(cards_list), width), dtype=bool)
+    numbers = np.zeros((len(cards_list), width), dtype=bool)
+    for matrix, attribute in ((winning, "winning_numbers"), (numbers, "numbers")):
+        rows = [np.full(len(getattr(card, attribute)), i) for i, card in enumerate(cards_list)]
+        columns = [getattr(card, attribute) for card in cards_list]
+        matrix[np.concatenate(rows), np.concatenate(columns).astype(np.int64)] = True
+
+    return (winning & numbers).sum(axis=1).tolist()
+
+
 def count_scratchcards_and_copies(cards: Dict[int, CardData]) -> int:
+    multipliers = {card_id: 1 for card_id in cards}
     for card_id, card_data in cards.items():
         for next_id in range(card_id + 1, card_id + card_data.matching + 1):
-            cards[next_id].multiplier += card_data.multiplier
+            multipliers[next_id] += multipliers[card_id]
 
-    return sum(card.multiplier for card in cards.values())
+    return sum(multipliers.values())
 
 
-def main():
-    sum = 0
-    if len(sys.argv) != 2:
-        print("Usage: python gear_ratios.py <filename>")
-        sys.exit(1)
+def count_copies(matching: List[int], modulus: Optional[int] = None) -> int:
+    # difference array, card i adds its copies to the range i + 1 .. i + matching[i] with two updates
+    # copies grow exponentially, python int keeps them exact, modulus keeps them small
+    difference = [0] * (len(matching) + 1)
+    running = 0
+    total = 0
+    for i, matches in enumerate(matching):
+        running += difference[i]
+        copies = 1 + running
+        if modulus is not None:
+            copies %= modulus
+        total += copies
+        difference[i + 1] += copies
+        difference[min(i + matches + 1, len(matching))] -= copies
 
-    filename = sys.argv[1]
-    cards = parse_file(filename)
+    return total % modulus if modulus is not None else total
 
-    for card_id, card_data in cards.items():
-        points = count_points(card_data)
-        print(f"Card {card_id}: {points}")
-        sum += points
 
-    print(f"Sum: {sum}")
+@dataclass(frozen=True)
+class Scratchcards:
+    # parsed cards with derived results, every result is computed on first access and then reused
+    cards: Dict[int, CardData]
+
+    @cached_property
+    def matching(self) -> Tuple[int, ...]:
+        return tuple(card_data.matching for card_data in self.cards.values())
+
+    @cached_property
+    def card_points(self) -> Tuple[int, ...]:
+        return tuple(count_points(card_data) for card_data in self.cards.values())
+
+    @cached_property
+    def points(self) -> int:
+        return sum(self.card_points)
+
+    @cached_property
+    def copies(self) -> int:
+        return count_copies(list(self.matching))
+
+    def copies_modulo(self, modulus: int) -> int:
+        return count_copies(list(self.matching), modulus)
+
+
+@lru_cache(maxsize=32)
+def _load_scratchcards(filename: str, modified: int, size: int) -> Scratchcards:
+    return Scratchcards(parse_file(filename))
+
+
+def load_scratchcards(filename: str) -> Scratchcards:
+    # file is parsed again only when it is changed
+    stat = os.stat(filename)
+    return _load_scratchcards(os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count points and copies of scratchcards.")
+    parser.add_argument("filename", help="input file, use - to read from stdin")
+    parser.add_argument("-s", "--stream", action="store_true", help="read cards line by line, print only results")
+    args = parser.parse_args()
+
+    filename = args.filename
+    if args.stream or filename == "-":
+        if filename == "-":
+            points, copies = score_stream(sys.stdin)
+        else:
+            with open(filename) as f:
+                points, copies = score_stream(f)
+        print(f"Sum: {points}")
+        print(f"Count: {copies}")
+        return
+
+    scratchcards = load_scratchcards(filename)
+
+    for card_id, points in zip(scratchcards.cards, scratchcards.card_points):
+        print(f"Card {card_id}: {points}")
 
-    count = count_scratchcards_and_copies(cards)
-    print(f"Count: {count}")
+    print(f"Sum: {scratchcards.points}")
+    print(f"Count: {scratchcards.copies}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+import os
+
+from scratchcards import (
+    CardData,
+    count_copies,
+    count_matching_numpy,
+    count_points,
+    count_scratchcards_and_copies,
+    iter_matches,
+    load_scratchcards,
+    parse_file,
+    score_stream,
+)
+
+DIRNAME = os.path.dirname(__file__)
+
+
+def test_count_matching_bitmask():
+    card = CardData([41, 48, 83, 86, 17], [83, 86, 6, 31, 17, 9, 48, 53])
+    assert card.count_matching() == 4
+    assert count_points(card) == 8
+
+
+def test_count_matching_numpy():
+    for name in ["example.txt", "input.txt"]:
+        cards = parse_file(os.path.join(DIRNAME, name))
+        expected = [sum(win in card.numbers for win in card.winning_numbers) for card in cards.values()]
+        assert count_matching_numpy(cards) == expected
+
+
+def test_example():
+    cards = parse_file(os.path.join(DIRNAME, "example.txt"))
+    assert sum(count_points(card) for card in cards.values()) == 13
+    assert count_scratchcards_and_copies(cards) == 30
+
+
+def test_count_copies():
+    for name in ["example.txt", "input.txt"]:
+        cards = parse_file(os.path.join(DIRNAME, name))
+        matching = [card.count_matching() for card in cards.values()]
+        expected = count_scratchcards_and_copies(cards)
+        assert count_copies(matching) == expected
+        assert count_copies(matching, 1000) == expected % 1000
+
+    assert count_copies([]) == 0
+
+
+def test_scoring_is_idempotent():
+    cards = parse_file(os.path.join(DIRNAME, "input.txt"))
+    assert [count_points(card) for card in cards.values()] == [count_points(card) for card in cards.values()]
+    assert count_scratchcards_and_copies(cards) == count_scratchcards_and_copies(cards) == 6283755
+    assert sum(count_points(card) for card in cards.values()) == 15268
+
+
+def test_load_scratchcards_is_memoised():
+    scratchcards = load_scratchcards(os.path.join(DIRNAME, "input.txt"))
+    assert load_scratchcards(os.path.join(DIRNAME, "input.txt")) is scratchcards
+    assert (scratchcards.points, scratchcards.copies) == (15268, 6283755)
+    assert (scratchcards.points, scratchcards.copies) == (15268, 6283755)
+    assert scratchcards.copies_modulo(1000) == 755
+
+
+def test_score_stream():
+    with open(os.path.join(DIRNAME, "example.txt")) as f:
+        assert list(iter_matches(f)) == [(1, 4), (2, 2), (3, 2), (4, 1), (5, 0), (6, 0)]
+
+    with open(os.path.join(DIRNAME, "input.txt")) as f:
+        assert score_stream(f) == (15268, 6283755)
+
+    with open(os.path.join(DIRNAME, "input.txt")) as f:
+        assert score_stream(f, 1000) == (15268, 755)
@@ -0,0 +1,58 @@
+import argparse
+import contextlib
+import os
+import random
+import tempfile
+import time
+
+from seeds import parse_file, seed_to_location
+
+STAGES = ["seed", "soil", "fertilizer", "water", "light", "temperature", "humidity", "location"]
+
+
+def generate_almanac(filename: str, seeds: int, maps: int = 40, seed: int = 2023, limit: int = 2**32) -> None:
+    # every stage cuts 0 .. limit into blocks, moves them to shuffled positions and keeps some of them as maps,
+    # the rest stays as identity gaps, seeds are written as (start, length) pairs
+    rnd = random.Random(seed)
+    with open(filename, "w") as f:
+        seed_values = []
+        for _ in range(max(1, seeds // 2)):
+            start = rnd.randrange(limit)
+            seed_values += [start, rnd.randint(1, max(1, (limit - start) // 1000))]
+        f.write(f"seeds: {' '.join(str(value) for value in seed_values)}\n")
+
+        for source, destination in zip(STAGES, STAGES[1:]):
+            borders = sorted(rnd.sample(range(1, limit), 2 * maps - 1))
+            blocks = list(zip([0] + borders, borders + [limit]))
+            shuffled = blocks[:]
+            rnd.shuffle(shuffled)
+            f.write(f"\n{source}-to-{destination} map:\n")
+            position = 0
+            for start, end in shuffled:
+                if rnd.random() < 0.75:
+                    f.write(f"{position} {start} {end - start}\n")
+                position += end - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark day 5 seed remapping on generated almanac.")
+    parser.add_argument("--seeds", type=int, default=100000)
+    parser.add_argument("--maps", type=int, default=40, help="blocks per stage")
+    parser.add_argument("--seed", type=int, default=2023)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "almanac.txt")
+        generate_almanac(filename, args.seeds, args.maps, args.seed)
+        seeds, mappings = parse_file(filename)
+        maps = {name: mapping.maps for name, mapping in mappings.items()}
+
+        # seed_to_location prints every remap
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            locations = [seed_to_location(seed, maps) for seed in seeds]
+        print(f"seed_to_location: {time.perf_counter() - start:8.3f} s, lowest location: {min(locations)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
 from __future__ import annotations
+from array import array
+import json
+from bisect import bisect_left, bisect_right
 from enum import Enum, auto
 import sys
 import re
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError:  # numpy engine falls back to seeds_to_locations()
+    np = None
 
 
 @dataclass
@@ -110,7 +118,8 @@ class Mapping:
             borders.append((other_map.source_range.start, other_map.destination_range.start, "s", "b"))
             borders.append((other_map.source_range.end, other_map.destination_range.end, "s", "e"))
 
-        borders = sorted(borders, key=lambda x: x[0])
+        # borders are used as a stack, the smallest border is at the end of the list
+        borders = sorted(borders, key=lambda x: x[0])[::-1]
         merged_maps = []
 
         left = None
@@ -124,15 +133,15 @@ class Mapping:
                     continue
 
                 if left is None:
-                    left = borders.pop(0)
+                    left = borders.pop()
                 if right is None:
-                    right = borders.pop(0)
+                    right = borders.pop()
 
                 if left[2] == right[2]:
                     state = MergeState.CREATE_MAP
                 elif left[0] == right[0]:
                     state = MergeState.MERGE_TO_LEFT
-                elif len(borders) > 0 and left[2] == "m" and right[0] == borders[0][0]:
+                elif len(borders) > 0 and left[2] == "m" and right[0] == borders[-1][0]:
                     state = MergeState.MERGE_TO_RIGHT
                 elif left[0] != right[0]:
                     state = MergeState.SPLIT
@@ -151,7 +160,6 @@ class Mapping:
                 else:
                     raise Exception("point type mismatch")
 
-                print(f"Creating map {map}")
                 assert map.is_valid()
                 merged_maps.append(map)
                 map = None
@@ -160,16 +168,16 @@ class Mapping:
                 state = MergeState.READ
 
             elif state == MergeState.MERGE_TO_LEFT:
-                borders.insert(0, self._merge_point(left, right, "b"))
+                borders.append(self._merge_point(left, right, "b"))
                 left = right = None
                 state = MergeState.READ
 
             elif state == MergeState.MERGE_TO_RIGHT:
-                # if left was merged I have to merge also right and right + 1 (right + 1 is first in borders)
+                # if left was merged I have to merge also right and right + 1 (right + 1 is last in borders)
                 assert left[2] == "m"
-                assert right[0] == borders[0][0]
-                borders.insert(0, self._merge_point(right, borders.pop(0), "e"))
-                borders.insert(0, left)
+                assert right[0] == borders[-1][0]
+                borders.append(self._merge_point(right, borders.pop(), "e"))
+                borders.append(left)
                 left = right = None
                 state = MergeState.READ
 
@@ -177,37 +185,37 @@ class Mapping:
                 # split interval before right
                 if left[3] == "b" and right[3] == "b":
                     delta = right[0] - left[0]
-                    borders.insert(0, (left[0] + delta, left[1] + delta, left[2], "b"))  # merge point
-                    borders.insert(0, right)
-                    borders.insert(0, (left[0] + delta - 1, left[1] + delta - 1, left[2], "e"))  # end of left
-                    borders.insert(0, left)
+                    borders.append((left[0] + delta, left[1] + delta, left[2], "b"))  # merge point
+                    borders.append(right)
+                    borders.append((left[0] + delta - 1, left[1] + delta - 1, left[2], "e"))  # end of left
+                    borders.append(left)
 
                 # split interval after left
                 elif left[3] == "e" and right[3] == "e":
                     delta = right[0] - left[0]
-                    borders.insert(0, right)
-                    borders.insert(0, (right[0] - delta + 1, right[1] - delta + 1, right[2], "b"))  # start of right
-                    borders.insert(0, left)
-                    borders.insert(0, (right[0] - delta, right[1] - delta, right[2], "e"))  # merge point
+                    borders.append(right)
+                    borders.append((right[0] - delta + 1, right[1] - delta + 1, right[2], "b"))  # start of right
+                    borders.append(left)
+                    borders.append((right[0] - delta, right[1] - delta, right[2], "e"))  # merge point
 
                 # split interval after right (when left is merged)
                 elif left[3] == "b" and right[3] == "e" and right[2] == "s":
                     assert left[2] == "m"
                     delta = right[1] - left[1]
                     # opposite type as right (I lost type of merged left)
-                    borders.insert(0, (right[0] + 1, left[0] + delta + 1, "d", "b"))  # start of right
-                    borders.insert(0, (right[0], left[0] + delta, "d", "e"))  # merge point
-                    borders.insert(0, right)
-                    borders.insert(0, left)
+                    borders.append((right[0] + 1, left[0] + delta + 1, "d", "b"))  # start of right
+                    borders.append((right[0], left[0] + delta, "d", "e"))  # merge point
+                    borders.append(right)
+                    borders.append(left)
 
                 elif left[3] == "b" and right[3] == "e" and right[2] == "d":
                     assert left[2] == "m"
                     delta = right[1] - left[0]
                     # opposite type as right (I lost type of merged left)
-                    borders.insert(0, (right[0] + 1, left[1] + delta + 1, "s", "b"))  # start of right
-                    borders.insert(0, (right[0], left[1] + delta, "s", "e"))  # merge point
-                    borders.insert(0, right)
-                    borders.insert(0, left)
+                    borders.append((right[0] + 1, left[1] + delta + 1, "s", "b"))  # start of right
+                    borders.append((right[0], left[1] + delta, "s", "e"))  # merge point
+                    borders.append(right)
+                    borders.append(left)
 
                 right = left = None
                 state = MergeState.READ
@@ -217,6 +225,303 @@ class Mapping:
         return Mapping(name=self.name.split("-")[0] + "-to-" + other.name.split("-")[2], maps=merged_maps)
 
 
+# upper bound of values, compiled mappings keep values in signed 64 bit arrays
+MAX_VALUE = 2**62
+
+
+@dataclass
+class CompiledMapping:
+    # maps sorted by source start as parallel arrays, value v is remapped by map i when starts[i] <= v <= ends[i]
+    name: str
+    starts: array = field(default_factory=lambda: array("q"))
+    ends: array = field(default_factory=lambda: array("q"))
+    offsets: array = field(default_factory=lambda: array("q"))
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping) -> CompiledMapping:
+        compiled = cls(name=mapping.name)
+        for map in sorted(mapping.maps, key=lambda x: x.source_range.start):
+            compiled.starts.append(map.source_range.start)
+            compiled.ends.append(map.source_range.end)
+            compiled.offsets.append(map.destination_range.start - map.source_range.start)
+
+        return compiled
+
+    def remap(self, value: int) -> int:
+        i = bisect_right(self.starts, value) - 1
+        if i >= 0 and value <= self.ends[i]:
+            return value + self.offsets[i]
+
+        return value
+
+    def remap_all(self, values: Iterable[int]) -> List[int]:
+        starts, ends, offsets = self.starts, self.ends, self.offsets
+        remapped = []
+        for value in values:
+            i = bisect_right(starts, value) - 1
+            remapped.append(value + offsets[i] if i >= 0 and value <= ends[i] else value)
+
+        return remapped
+
+    def remap_numpy(self, values: np.ndarray) -> np.ndarray:
+        # whole array of values at once, searchsorted finds the only map which can contain the value
+        if len(self.starts) == 0:
+            return values
+
+        starts = np.frombuffer(self.starts, dtype=np.int64)
+        ends = np.frombuffer(self.ends, dtype=np.int64)
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        i = np.searchsorted(starts, values, side="right") - 1
+        inside = (i >= 0) & (values <= ends[np.maximum(i, 0)])
+        return values + np.where(inside, offsets[np.maximum(i, 0)], 0)
+
+    def split(self, interval: Interval) -> Iterator[Tuple[Interval, int]]:
+        # parts of interval split at map borders with offset of each part, parts in gaps between maps have offset 0
+        starts, ends, offsets = self.starts, self.ends, self.offsets
+        position = interval.start
+        # i is the map containing position or the first map after it
+        i = bisect_right(starts, position) - 1
+        if i < 0 or ends[i] < position:
+            i += 1
+
+        while position <= interval.end:
+            if i < len(starts) and starts[i] <= position:
+                end = min(interval.end, ends[i])
+                yield Interval(position, end), offsets[i]
+                i += 1
+            else:
+                end = min(interval.end, starts[i] - 1) if i < len(starts) else interval.end
+                yield Interval(position, end), 0
+            position = end + 1
+
+    def remap_intervals(self, intervals: Iterable[Interval]) -> List[Interval]:
+        remapped = []
+        for interval in intervals:
+            for part, offset in self.split(interval):
+                remapped.append(Interval(part.start + offset, part.end + offset))
+
+        return merge_intervals(remapped)
+
+    def segments(self) -> Iterator[Tuple[Interval, int]]:
+        # whole domain 0 .. MAX_VALUE as maps and identity gaps between them
+        return self.split(Interval(0, MAX_VALUE))
+
+    def compose(self, other: CompiledMapping) -> CompiledMapping:
+        # mapping of value v to other.remap(self.remap(v)), image of every segment is split at borders of other,
+        # so it is O((n + m) log m) plus the number of created maps
+        name = self.name.split("-")[0] + "-to-" + other.name.split("-")[-1]
+        composed = CompiledMapping(name=name)
+        for segment, offset in self.segments():
+            image = Interval(segment.start + offset, segment.end + offset)
+            for part, other_offset in other.split(image):
+                start, end, total = part.start - offset, part.end - offset, offset + other_offset
+                if total == 0:
+                    continue
+                if composed.ends and composed.ends[-1] + 1 == start and composed.offsets[-1] == total:
+                    composed.ends[-1] = end
+                else:
+                    composed.starts.append(start)
+                    composed.ends.append(end)
+                    composed.offsets.append(total)
+
+        return composed
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "starts": list(self.starts), "ends": list(self.ends), "offsets": list(self.offsets)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> CompiledMapping:
+        return cls(data["name"], array("q", data["starts"]), array("q", data["ends"]), array("q", data["offsets"]))
+
+    def save(self, filename: str) -> None:
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, filename: str) -> CompiledMapping:
+        with open(filename) as f:
+            return cls.from_dict(json.load(f))
+
+
+@dataclass
+class ReverseMapping:
+    # destination axis split to pieces with the same set of preimages, value v in starts[i] <= v <= ends[i]
+    # comes from every v + o for o in offsets[i], values outside of pieces have no preimage
+    name: str
+    starts: array = field(default_factory=lambda: array("q"))
+    ends: array = field(default_factory=lambda: array("q"))
+    offsets: List[Tuple[int, ...]] = field(default_factory=list)
+
+    @classmethod
+    def from_mapping(cls, compiled: CompiledMapping) -> ReverseMapping:
+        # sweep over borders of destination ranges, identity gaps included, destinations of maps may overlap
+        events: Dict[int, List[Tuple[int, int]]] = {}
+        for segment, offset in compiled.segments():
+            events.setdefault(segment.start + offset, []).append((1, -offset))
+            events.setdefault(segment.end + offset + 1, []).append((-1, -offset))
+
+        reverse = cls(name="-to-".join(reversed(compiled.name.split("-to-"))))
+        active: Dict[int, int] = {}
+        previous = None
+        for position in sorted(events):
+            if active and previous is not None:
+                offsets = tuple(sorted(active))
+                if reverse.ends and reverse.ends[-1] + 1 == previous and reverse.offsets[-1] == offsets:
+                    reverse.ends[-1] = position - 1
+                else:
+                    reverse.starts.append(previous)
+                    reverse.ends.append(position - 1)
+                    reverse.offsets.append(offsets)
+            for delta, offset in events[position]:
+                active[offset] = active.get(offset, 0) + delta
+                if active[offset] == 0:
+                    del active[offset]
+            previous = position
+
+        return reverse
+
+    def sources(self, value: int) -> List[int]:
+        i = bisect_right(self.starts, value) - 1
+        if i >= 0 and value <= self.ends[i]:
+            return [value + offset for offset in self.offsets[i]]
+
+        return []
+
+    def source_intervals(self, intervals: Iterable[Interval]) -> List[Interval]:
+        # preimage of location intervals, each interval is cut at borders of pieces
+        starts, ends = self.starts, self.ends
+        sources = []
+        for interval in intervals:
+            i = max(bisect_right(starts, interval.start) - 1, 0)
+            while i < len(starts) and starts[i] <= interval.end:
+                start, end = max(starts[i], interval.start), min(ends[i], interval.end)
+                if start <= end:
+                    sources.extend(Interval(start + offset, end + offset) for offset in self.offsets[i])
+                i += 1
+
+        return merge_intervals(sources)
+
+
+@dataclass
+class SearchStats:
+    # work done by a reverse search, candidates are single values looked up one by one, pieces are pieces of
+    # the reverse mapping and source_intervals are their preimages intersected with the seed ranges
+    candidates: int = 0
+    pieces: int = 0
+    source_intervals: int = 0
+
+
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    # sorted intervals, overlapping and touching ones are joined
+    merged: List[Interval] = []
+    for interval in sorted(intervals, key=lambda x: x.start):
+        if merged and interval.start <= merged[-1].end + 1:
+            merged[-1] = Interval(merged[-1].start, max(merged[-1].end, interval.end))
+        else:
+            merged.append(Interval(interval.start, interval.end))
+
+    return merged
+
+
+def seed_intervals(seeds: List[int]) -> List[Interval]:
+    # part two, seeds are pairs of start and length
+    return [Interval(seeds[i], seeds[i] + seeds[i + 1] - 1) for i in range(0, len(seeds) - 1, 2) if seeds[i + 1] > 0]
+
+
+def lowest_location_for_intervals(intervals: List[Interval], compiled: List[CompiledMapping]) -> Optional[int]:
+    # whole intervals are pushed through the stages, work depends on number of intervals, not on number of seeds
+    intervals = merge_intervals(intervals)
+    for stage in compiled:
+        intervals = stage.remap_intervals(intervals)
+
+    return intervals[0].start if intervals else None
+
+
+def compile_mappings(mappings: Dict[str, Mapping]) -> List[CompiledMapping]:
+    return [CompiledMapping.from_mapping(mapping) for mapping in mappings.values()]
+
+
+def compose_all(compiled: List[CompiledMapping]) -> CompiledMapping:
+    # whole chain folded to one mapping, e.g. seed-to-location
+    composed = compiled[0]
+    for stage in compiled[1:]:
+        composed = composed.compose(stage)
+
+    return composed
+
+
+def seeds_to_locations(seeds: Iterable[int], compiled: List[CompiledMapping]) -> List[int]:
+    # whole list of seeds goes through one stage before the next one
+    values = list(seeds)
+    for stage in compiled:
+        values = stage.remap_all(values)
+
+    return values
+
+
+def lowest_location_numpy(seeds: Iterable[int], compiled: List[CompiledMapping]) -> Optional[int]:
+    seeds = list(seeds)
+    if not seeds:
+        return None
+    if np is None:
+        return min(seeds_to_locations(seeds, compiled))
+
+    values = np.array(seeds, dtype=np.int64)
+    for stage in compiled:
+        values = stage.remap_numpy(values)
+
+    return int(values.min())
+
+
+def _first_overlap(intervals: List[Interval], ends: List[int], interval: Interval) -> Optional[int]:
+    # lowest value of interval inside of sorted disjoint intervals, ends are their ends
+    i = bisect_left(ends, interval.start)
+    if i < len(intervals) and intervals[i].start <= interval.end:
+        return max(intervals[i].start, interval.start)
+
+    return None
+
+
+def lowest_location_by_reverse(
+    intervals: List[Interval], reverse: ReverseMapping, stats: Optional[SearchStats] = None
+) -> Optional[int]:
+    # pieces of location-to-seed mapping are scanned upward from location 0, seeds of a whole piece are intersected
+    # with the seed ranges, pieces are disjoint and sorted, so the first piece with a seed holds the lowest location
+    stats = stats if stats is not None else SearchStats()
+    intervals = merge_intervals(intervals)
+    ends = [interval.end for interval in intervals]
+    for start, end, offsets in zip(reverse.starts, reverse.ends, reverse.offsets):
+        stats.pieces += 1
+        stats.source_intervals += len(offsets)
+        # lowest location of the piece is given by the lowest seed hit of any of its offsets
+        locations = []
+        for offset in offsets:
+            seed = _first_overlap(intervals, ends, Interval(start + offset, end + offset))
+            if seed is not None:
+                locations.append(seed - offset)
+
+        if locations:
+            return min(locations)
+
+    return None
+
+
+def lowest_location_by_scan(
+    intervals: List[Interval], reverse: ReverseMapping, stats: Optional[SearchStats] = None, limit: int = MAX_VALUE
+) -> Optional[int]:
+    # naive search, locations are tried one by one from 0, only usable when the answer is small
+    stats = stats if stats is not None else SearchStats()
+    intervals = merge_intervals(intervals)
+    ends = [interval.end for interval in intervals]
+    for location in range(limit + 1):
+        stats.candidates += 1
+        for seed in reverse.sources(location):
+            if _first_overlap(intervals, ends, Interval(seed, seed)) is not None:
+                return location
+
+    return None
+
+
 def parse_file(filename: str) -> Tuple[List[int], Dict[str, Mapping]]:
     mappings: Dict[str, Mapping] = {}
     with open(filename) as f:
@@ -226,7 +531,7 @@ def parse_file(filename: str) -> Tuple[List[int], Dict[str, Mapping]]:
     match = seeds_pattern.search(text)
     seeds = [int(num) for num in match.group("seeds").split()]
 
-    map_pattern = re.compile(r"(?P<map_name>.*) map:\n(?P<maps>(?:\d+ \d+ \d+\n?)+)", re.MULTILINE)
+    map_pattern = re.compile(r"^(?P<map_name>\S+) map:\n(?P<maps>(?:\d+ \d+ \d+\n?)+)", re.MULTILINE)
     mappings_pattern = re.compile(r"(?P<destination>\d+)\s(?P<source>\d+)\s(?P<length>\d+)")
 
     for match in map_pattern.finditer(text):
@@ -262,19 +567,24 @@ def seed_to_location(seed: int, maps: Dict[str, List[Map]]):
     return seed
 
 
-def location_to_seed(location: int, maps: Dict[str, List[Map]]):
-    for map_name, map_lists in reversed(maps.items()):
-        for one_map in map_lists:
-            value = one_map.reverse_remap(location)
+def location_to_seed(location: int, maps: Dict[str, List[Map]], stats: Optional[SearchStats] = None) -> List[int]:
+    # all seeds of the location, value not in any source range is its own preimage, ranges may share destinations
+    stats = stats if stats is not None else SearchStats()
+    values = {location}
+    for map_lists in reversed(maps.values()):
+        sources = set()
+        for value in values:
+            stats.candidates += 1
+            if not any(one_map.source_range.contains(value) for one_map in map_lists):
+                sources.add(value)
+            for one_map in map_lists:
+                source = one_map.reverse_remap(value)
 
-            if value is not None:
-                print(f"{location} remapped to {value} by {map_name}")
-                location = value
-                break
-            else:
-                return None
+                if source is not None:
+                    sources.add(source)
+        values = sources
 
-    return location
+    return sorted(values)
 
 
 def main():
@@ -288,28 +598,25 @@ def main():
     # print(f"Seeds: {seeds}")
     # print(f"Maps: {maps}")
 
-    # part two, seeds contains pairs of seeds
-    seeds_ranges = [(seeds[i], seeds[i] + seeds[i + 1]) for i in range(0, len(seeds), 2)]
-    print(f"Seeds ranges: {seeds_ranges}")
-
-    # locations = []
-    # for seed in seeds:
-    #     print(f"Remapping seed {seed}")
-    #     locations.append(seed_to_location(seed, maps))
-
-    #     print(f"The lowest location number is {min(locations)}")
+    compiled = compile_mappings(mappings)
+    locations = seeds_to_locations(seeds, compiled)
+    print(f"The lowest location number is {min(locations)}")
 
-    merged = None
-    for mapping in mappings.values():
-        if merged is None:
-            print(f"First mapping {mapping.name}")
-            merged = mapping
-        else:
-            print(f"Merging mapping {merged.name} with {mapping.name}")
-            print(mapping)
-            merged = merged.merge(mapping)
-
-        print(merged)
+    # part two, seeds contains pairs of seeds
+    seeds_ranges = seed_intervals(seeds)
+    print(f"Seeds ranges: {[(interval.start, interval.end) for interval in seeds_ranges]}")
+    print(f"The lowest location number of seed ranges is {lowest_location_for_intervals(seeds_ranges, compiled)}")
+
+    composed = compose_all(compiled)
+    print(f"Composed mapping {composed.name} has {len(composed.starts)} maps")
+
+    reverse = ReverseMapping.from_mapping(composed)
+    stats = SearchStats()
+    lowest = lowest_location_by_reverse(seeds_ranges, reverse, stats)
+    print(
+        f"Reverse search found {lowest} after {stats.pieces} of {len(reverse.starts)} pieces "
+        f"and {stats.source_intervals} seed intervals"
+    )
 
 
 if __name__ == "__main__":
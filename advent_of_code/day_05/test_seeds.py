@@ -1,4 +1,29 @@
-from seeds import Interval, Mapping, Map
+import os
+
+import seeds as seeds_module
+from seeds import (
+    CompiledMapping,
+    Interval,
+    Mapping,
+    Map,
+    ReverseMapping,
+    SearchStats,
+    compile_mappings,
+    compose_all,
+    location_to_seed,
+    lowest_location_for_intervals,
+    lowest_location_by_reverse,
+    lowest_location_by_scan,
+    lowest_location_numpy,
+    parse_file,
+    seed_intervals,
+    seed_to_location,
+    seeds_to_locations,
+)
+
+DIRNAME = os.path.dirname(__file__)
+
+np = seeds_module.np
 
 
 def test_merge_wide_to_narrow():
@@ -319,3 +344,188 @@ def test_complex_merge():
     pass
     # assert merged_expected.name == merged.name
     # assert merged_expected == merged
+
+
+def compiled_remap(value, compiled):
+    for stage in compiled:
+        value = stage.remap(value)
+    return value
+
+
+def test_compiled_mapping_matches_seed_to_location():
+    seeds, mappings = parse_file(os.path.join(DIRNAME, "input.txt"))
+    maps = {name: mapping.maps for name, mapping in mappings.items()}
+    compiled = compile_mappings(mappings)
+
+    values = seeds + [0, 1, 2**32, 2**40] + [seed + delta for seed in seeds for delta in (-1, 1, 1000)]
+    expected = [seed_to_location(value, maps) for value in values]
+    assert seeds_to_locations(values, compiled) == expected
+    assert [compiled_remap(value, compiled) for value in values] == expected
+
+
+def test_seeds_to_locations_example():
+    seeds, mappings = parse_file(os.path.join(DIRNAME, "example.txt"))
+    assert seeds_to_locations(seeds, compile_mappings(mappings)) == [82, 43, 86, 35]
+
+
+def test_remap_intervals_splits_at_borders():
+    compiled = CompiledMapping.from_mapping(
+        create_mapping_from_text(
+            "one-to-second",
+            """
+            10 - 19 -> 110 - 119
+            20 - 29 ->   0 -   9
+            40 - 49 -> 140 - 149
+            """,
+        )
+    )
+    assert compiled.remap_intervals([Interval(5, 45)]) == [
+        Interval(0, 9),
+        Interval(30, 39),
+        Interval(110, 119),
+        Interval(140, 145),
+    ]
+    assert compiled.remap_intervals([Interval(50, 60), Interval(0, 4)]) == [Interval(0, 4), Interval(50, 60)]
+
+
+def test_lowest_location_for_intervals():
+    seeds, mappings = parse_file(os.path.join(DIRNAME, "example.txt"))
+    assert lowest_location_for_intervals(seed_intervals(seeds), compile_mappings(mappings)) == 46
+
+    # small ranges around the real seeds can be checked seed by seed
+    seeds, mappings = parse_file(os.path.join(DIRNAME, "input.txt"))
+    compiled = compile_mappings(mappings)
+    for start in seeds:
+        intervals = [Interval(start - 300, start + 300)]
+        expected = min(seeds_to_locations(range(start - 300, start + 301), compiled))
+        assert lowest_location_for_intervals(intervals, compiled) == expected
+
+
+def test_compose_keeps_identity_gaps():
+    upper = Mapping(name="one-to-second", maps=[Map(source_range=Interval(15, 20), destination_range=Interval(60, 65))])
+    lower = Mapping(
+        name="second-to-third", maps=[Map(source_range=Interval(55, 70), destination_range=Interval(30, 45))]
+    )
+
+    composed = CompiledMapping.from_mapping(upper).compose(CompiledMapping.from_mapping(lower))
+    assert composed.name == "one-to-third"
+    assert list(zip(composed.starts, composed.ends, composed.offsets)) == [
+        (15, 20, 20),
+        (55, 70, -25),
+    ]
+    assert [composed.remap(value) for value in (14, 15, 20, 21, 54, 55, 60, 70, 71)] == [
+        14, 35, 40, 21, 54, 30, 35, 45, 71
+    ]
+
+
+def test_compose_all_matches_chain(tmp_path):
+    for name in ["example.txt", "input.txt"]:
+        seeds, mappings = parse_file(os.path.join(DIRNAME, name))
+        compiled = compile_mappings(mappings)
+        composed = compose_all(compiled)
+        assert composed.name == "seed-to-location"
+
+        borders = [value for stage in compiled for value in list(stage.starts) + list(stage.ends)]
+        values = seeds + [0, 1] + [border + delta for border in borders for delta in (-1, 0, 1)]
+        assert composed.remap_all(values) == seeds_to_locations(values, compiled)
+
+        intervals = seed_intervals(seeds)
+        assert composed.remap_intervals(intervals)[0].start == lowest_location_for_intervals(intervals, compiled)
+
+        composed.save(tmp_path / "composed.json")
+        assert CompiledMapping.load(tmp_path / "composed.json") == composed
+
+
+def test_lowest_location_numpy(monkeypatch):
+    seeds, mappings = parse_file(os.path.join(DIRNAME, "input.txt"))
+    compiled = compile_mappings(mappings)
+    values = seeds + [0, 2**40] + [value + delta for stage in compiled for value in stage.ends for delta in (0, 1)]
+    expected = min(seeds_to_locations(values, compiled))
+    assert lowest_location_numpy(values, compiled) == expected
+
+    if seeds_module.np is not None:
+        locations = np.array(values, dtype=np.int64)
+        for stage in compiled:
+            locations = stage.remap_numpy(locations)
+        assert locations.tolist() == seeds_to_locations(values, compiled)
+
+    monkeypatch.setattr(seeds_module, "np", None)
+    assert lowest_location_numpy(values, compiled) == expected
+    assert lowest_location_numpy([], compiled) is None
+
+
+def overlapping_maps():
+    # destinations of both stages overlap identity gaps and each other
+    return {
+        "seed-to-soil": [Map(source_range=Interval(10, 19), destination_range=Interval(30, 39))],
+        "soil-to-location": [
+            Map(source_range=Interval(0, 4), destination_range=Interval(35, 39)),
+            Map(source_range=Interval(50, 59), destination_range=Interval(0, 9)),
+        ],
+    }
+
+
+def test_location_to_seed_handles_gaps():
+    maps = overlapping_maps()
+    # 35 is a gap of both maps, destination of 0 and destination of 15
+    stats = SearchStats()
+    assert location_to_seed(35, maps, stats) == [0, 15, 35]
+    assert stats.candidates == 3
+    # 3 comes only from 53, 3 itself is inside of a source range
+    assert location_to_seed(3, maps) == [53]
+    assert location_to_seed(12, maps) == []
+    for location in range(70):
+        assert all(seed_to_location(seed, maps) == location for seed in location_to_seed(location, maps))
+
+
+def test_reverse_mapping_inverts_composed():
+    seeds, mappings = parse_file(os.path.join(DIRNAME, "example.txt"))
+    compiled = compile_mappings(mappings)
+    composed = compose_all(compiled)
+    reverse = ReverseMapping.from_mapping(composed)
+    assert reverse.name == "location-to-seed"
+
+    maps = {name: mapping.maps for name, mapping in mappings.items()}
+    for location in range(120):
+        sources = reverse.sources(location)
+        assert sources == location_to_seed(location, maps)
+        assert all(composed.remap(seed) == location for seed in sources)
+
+    intervals = [Interval(40, 60), Interval(80, 99)]
+    locations = [location for interval in intervals for location in range(interval.start, interval.end + 1)]
+    expected = sorted({seed for location in locations for seed in reverse.sources(location)})
+    sources = reverse.source_intervals(intervals)
+    assert [seed for interval in sources for seed in range(interval.start, interval.end + 1)] == expected
+
+
+def test_lowest_location_by_reverse():
+    seeds, mappings = parse_file(os.path.join(DIRNAME, "example.txt"))
+    reverse = ReverseMapping.from_mapping(compose_all(compile_mappings(mappings)))
+    intervals = seed_intervals(seeds)
+
+    pruned, naive = SearchStats(), SearchStats()
+    assert lowest_location_by_reverse(intervals, reverse, pruned) == 46
+    assert lowest_location_by_scan(intervals, reverse, naive) == 46
+    assert naive.candidates == 47
+    assert pruned.pieces < len(reverse.starts)
+    assert pruned.source_intervals == 9
+    assert pruned.candidates == naive.pieces == naive.source_intervals == 0
+    assert lowest_location_by_scan(intervals, reverse, limit=45) is None
+    assert lowest_location_by_reverse([], reverse) is None
+
+    seeds, mappings = parse_file(os.path.join(DIRNAME, "input.txt"))
+    compiled = compile_mappings(mappings)
+    intervals = seed_intervals(seeds)
+    reverse = ReverseMapping.from_mapping(compose_all(compiled))
+    assert lowest_location_by_reverse(intervals, reverse) == lowest_location_for_intervals(intervals, compiled)
+
+
+def test_lowest_location_by_reverse_overlapping_destinations():
+    maps = overlapping_maps()
+    mappings = {name: Mapping(name=name, maps=map_list) for name, map_list in maps.items()}
+    reverse = ReverseMapping.from_mapping(compose_all(compile_mappings(mappings)))
+    for start in range(0, 70, 3):
+        for length in (1, 4, 20):
+            intervals = [Interval(start, start + length - 1)]
+            expected = min(seed_to_location(seed, maps) for seed in range(start, start + length))
+            assert lowest_location_by_reverse(intervals, reverse) == expected